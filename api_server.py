@@ -0,0 +1,390 @@
+"""
+Local HTTP/JSON API for the library, served with asyncio streams.
+
+Reads (listings, lookups, search, sort pages) are answered straight from
+the in-memory repository and its maintained sorted indexes. A full sort
+with an explicitly chosen algorithm runs on a separate thread, so it does
+not hold up other requests. Every mutation goes through one queue that a single
+writer task drains, so concurrent checkouts are applied one after another
+and never interleave their writes to the journal or the snapshot files.
+Borrows and returns that queue up while the writer is busy are applied
+together as one batch and persisted as one journal entry.
+
+Usage: python api_server.py [--host 127.0.0.1] [--port 8080] [--storage json|sqlite]
+
+Endpoints (JSON bodies and responses):
+    GET  /books, /members, /transactions   ?offset=0&limit=100
+    GET  /books/<id>, /members/<id>
+    POST /books                            {"title", "author", "isbn"}
+    POST /members                          {"name", "contact"}
+    POST /borrow, /return                  {"book_id", "member_id"}
+    POST /borrow/batch, /return/batch      {"operations": [[book_id, member_id], ...]}
+    GET  /search                           ?q=words&limit=10
+    GET  /sort/books, /sort/members        ?key=title&secondary=and:available:available&offset=0&limit=100
+                                           &algorithm=Merge+Sort+(Bottom-up) (optional)
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit, parse_qs
+
+from library_service import (LibraryService, LibraryError, ValidationError, NotFoundError, LoanError, DataFileError,
+                             StorageLockedError)
+from sorting import logical_and, logical_or, logical_implies
+
+# Items returned by a listing or sort when no limit is given
+DEFAULT_LIMIT = 100
+# Largest request body accepted
+MAX_BODY_BYTES = 10 * 1024 * 1024
+# Most queued mutations the writer applies before yielding to readers again
+MAX_WRITE_GROUP = 1000
+# Sorting algorithms not offered by /sort: this one starts a process pool per call
+UNSERVED_ALGORITHMS = ("Parallel Merge Sort",)
+# Algorithms that read the live sorted indexes or the database connection,
+# which belong to the event loop thread
+LOOP_ALGORITHMS = (LibraryService.MAINTAINED_INDEX, LibraryService.DATABASE_QUERY)
+
+ERROR_STATUS = {
+    ValidationError: 400,
+    DataFileError: 400,
+    NotFoundError: 404,
+    LoanError: 409,
+}
+REASONS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+LOGIC_FUNCTIONS = {"and": logical_and, "or": logical_or, "implies": logical_implies}
+
+
+class LibraryServer:
+    """
+    Serves a LibraryService over HTTP/1.1 with keep-alive.
+
+    Request handlers run on the event loop and never block on each other
+    except while the writer applies a group of mutations, which is done
+    without awaiting so readers never see a half-applied change.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self._queue = None
+        self._writer_task = None
+        # Full sorts run one at a time, off the event loop
+        self._sort_executor = ThreadPoolExecutor(max_workers=1)
+        self._routes = [
+            ("GET", r"/books", self.list_books, 200),
+            ("GET", r"/books/(\d+)", self.get_book, 200),
+            ("POST", r"/books", self.add_book, 201),
+            ("GET", r"/members", self.list_members, 200),
+            ("GET", r"/members/(\d+)", self.get_member, 200),
+            ("POST", r"/members", self.add_member, 201),
+            ("GET", r"/transactions", self.list_transactions, 200),
+            ("POST", r"/borrow", self.borrow, 200),
+            ("POST", r"/return", self.return_, 200),
+            ("POST", r"/borrow/batch", self.borrow_batch, 200),
+            ("POST", r"/return/batch", self.return_batch, 200),
+            ("GET", r"/search", self.search, 200),
+            ("GET", r"/sort/(books|members)", self.sort, 200),
+        ]
+        self._routes = [(method, re.compile(pattern + "$"), handler, status)
+                        for method, pattern, handler, status in self._routes]
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """Start listening and the writer task, returns the asyncio server"""
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer())
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def stop(self):
+        """Apply the mutations still queued, then compact and close the storage"""
+        if not self._writer_task.done():
+            await self._queue.join()
+            self._writer_task.cancel()
+        self._sort_executor.shutdown(cancel_futures=True)
+        self.service.close()
+
+    # HTTP
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    self._send(writer, 400, {"error": "Malformed request"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    self._send(writer, 413, {"error": "Request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.dispatch(method, target, body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self._send(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _send(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n")
+        if not keep_alive:
+            head += "Connection: close\r\n"
+        writer.write(head.encode() + b"\r\n" + data)
+
+    async def dispatch(self, method, target, body):
+        """Route a request, returns (status, JSON payload)"""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        path = url.path.rstrip("/") or "/"
+
+        path_matched = False
+        for route_method, pattern, handler, status in self._routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                path_matched = True
+                continue
+            try:
+                data = json.loads(body) if body else {}
+                return status, await handler(*match.groups(), query=query, data=data)
+            except LibraryError as e:
+                return ERROR_STATUS.get(type(e), 400), {"error": str(e)}
+            except KeyError as e:
+                return 400, {"error": f"Missing field: {e}"}
+            except (ValueError, TypeError) as e:
+                # Malformed JSON or wrongly typed values
+                return 400, {"error": f"Bad request: {e}"}
+            except Exception as e:
+                return 500, {"error": str(e)}
+        if path_matched:
+            return 405, {"error": f"{method} is not allowed on {path}"}
+        return 404, {"error": f"No such endpoint: {path}"}
+
+    # Single writer
+    async def _mutate(self, kind, *args):
+        """Queue a mutation for the writer and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((kind, args, future))
+        return await future
+
+    async def _writer(self):
+        while True:
+            group = [await self._queue.get()]
+            while not self._queue.empty() and len(group) < MAX_WRITE_GROUP:
+                group.append(self._queue.get_nowait())
+
+            position = 0
+            while position < len(group):
+                kind = group[position][0]
+                end = position + 1
+                if kind in ("borrow", "return"):
+                    # Consecutive borrows (or returns) are applied and journaled as one batch
+                    while end < len(group) and group[end][0] == kind:
+                        end += 1
+                    self._apply_loans(kind, group[position:end])
+                else:
+                    self._apply(*group[position])
+                position = end
+
+            for _ in group:
+                self._queue.task_done()
+
+    def _apply(self, function, args, future):
+        try:
+            result = function(*args)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _apply_loans(self, kind, entries):
+        apply_batch = self.service.borrow_books if kind == "borrow" else self.service.return_books
+        try:
+            results = apply_batch([args for _, args, _ in entries])
+        except Exception as e:
+            for _, _, future in entries:
+                future.set_exception(e)
+            return
+
+        for result, (_, _, future) in zip(results, entries):
+            if result["success"]:
+                transaction = self.service.repository.get_transaction(result.get("transaction_id"))
+                future.set_result(transaction)
+            elif not self.service.repository.has_book(result["book_id"]):
+                future.set_exception(NotFoundError(f"No book with ID {result['book_id']}."))
+            elif not self.service.repository.has_member(result["member_id"]):
+                future.set_exception(NotFoundError(f"No member with ID {result['member_id']}."))
+            else:
+                future.set_exception(LoanError(result["error"]))
+
+    # Handlers
+    async def list_books(self, query, data):
+        return [book.to_dict() for book in self.service.list_books(*self._page(query))]
+
+    async def get_book(self, book_id, query, data):
+        return self.service.get_book(int(book_id)).to_dict()
+
+    async def add_book(self, query, data):
+        book = await self._mutate(self.service.add_book, data["title"], data["author"], data["isbn"])
+        return book.to_dict()
+
+    async def list_members(self, query, data):
+        return [member.to_dict() for member in self.service.list_members(*self._page(query))]
+
+    async def get_member(self, member_id, query, data):
+        return self.service.get_member(int(member_id)).to_dict()
+
+    async def add_member(self, query, data):
+        member = await self._mutate(self.service.add_member, data["name"], data["contact"])
+        return member.to_dict()
+
+    async def list_transactions(self, query, data):
+        return [t.to_dict() for t in self.service.list_transactions(*self._page(query))]
+
+    async def borrow(self, query, data):
+        transaction = await self._mutate("borrow", int(data["book_id"]), int(data["member_id"]))
+        return transaction.to_dict()
+
+    async def return_(self, query, data):
+        transaction = await self._mutate("return", int(data["book_id"]), int(data["member_id"]))
+        return transaction.to_dict() if transaction else None
+
+    async def borrow_batch(self, query, data):
+        return await self._mutate(self.service.borrow_books, self._operations(data),
+                                  bool(data.get("all_or_nothing")))
+
+    async def return_batch(self, query, data):
+        return await self._mutate(self.service.return_books, self._operations(data),
+                                  bool(data.get("all_or_nothing")))
+
+    async def search(self, query, data):
+        limit = int(query.get("limit", LibraryService.SEARCH_RESULTS))
+        return [{"book": book.to_dict(), "score": score}
+                for book, score in self.service.search_books(query.get("q", ""), limit)]
+
+    async def sort(self, kind, query, data):
+        """
+        One page of the sorted books or members
+
+        Without an algorithm the page is read from the maintained sorted
+        index. A chosen algorithm sorts everything on the sort thread; these
+        runs are not added to the performance analyzer's results.
+        """
+        primary_key = query.get("key", "book_id" if kind == "books" else "member_id")
+        secondary_keys = self._secondary_keys(query.get("secondary"))
+        offset, limit = self._page(query)
+        algorithm = query.get("algorithm")
+        total = len(self.service.books if kind == "books" else self.service.members)
+
+        if algorithm is None:
+            start = time.perf_counter()
+            items = self.service.indexed_page(kind, primary_key, secondary_keys, offset, limit)
+            return {
+                "algorithm": LibraryService.MAINTAINED_INDEX,
+                "selected_algorithm": None,
+                "execution_time": time.perf_counter() - start,
+                "total": total,
+                "items": [item.to_dict() for item in items],
+            }
+
+        if algorithm in UNSERVED_ALGORITHMS:
+            raise ValidationError(f"{algorithm} is not available through the API.")
+        sort = partial(self.service.sort, kind, primary_key, secondary_keys, algorithm, record=False)
+        if algorithm in LOOP_ALGORITHMS:
+            result = sort()
+        else:
+            result = await asyncio.get_running_loop().run_in_executor(self._sort_executor, sort)
+        return {
+            "algorithm": result["algorithm"],
+            "selected_algorithm": result["selected_algorithm"],
+            "execution_time": result["execution_time"],
+            "total": len(result["items"]),
+            "items": [item.to_dict() for item in result["items"][offset:offset + limit]],
+        }
+
+    def _page(self, query):
+        offset, limit = int(query.get("offset", 0)), int(query.get("limit", DEFAULT_LIMIT))
+        if offset < 0 or limit < 0:
+            raise ValidationError("offset and limit must not be negative.")
+        return offset, limit
+
+    def _operations(self, data):
+        return [(int(book_id), int(member_id)) for book_id, member_id in data["operations"]]
+
+    def _secondary_keys(self, value):
+        """Parse 'and:available:available,or:p:q' into sorting secondary keys"""
+        if not value:
+            return None
+        keys = []
+        for expression in value.split(","):
+            parts = expression.split(":")
+            if len(parts) != 3 or parts[0] not in LOGIC_FUNCTIONS:
+                raise ValidationError(f"Invalid secondary key '{expression}'; use and|or|implies:p:q.")
+            keys.append((LOGIC_FUNCTIONS[parts[0]], parts[1], parts[2]))
+        return keys
+
+
+async def serve(host, port, storage):
+    server = LibraryServer(LibraryService(storage))
+    listener = await server.start(host, port)
+
+    # Stop on Ctrl+C or SIGTERM after the queued mutations are applied
+    stopping = asyncio.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal_number, stopping.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+
+    print(f"Serving the library on http://{host}:{port}", flush=True)
+    try:
+        async with listener:
+            await stopping.wait()
+    finally:
+        await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the library as a local HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--storage", choices=("json", "sqlite"),
+                        default=os.environ.get("LIBRARY_STORAGE", "json"))
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.storage))
+    except StorageLockedError as e:
+        sys.exit(f"Error: {e}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
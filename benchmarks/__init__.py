@@ -0,0 +1 @@
+"""Headless benchmarks for the Library Management System."""
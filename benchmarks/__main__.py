@@ -0,0 +1,248 @@
+"""
+Headless benchmark suite with JSON results and regression gates.
+
+Times sorting, CSV import/export, JSON snapshot load/save, borrow/return
+throughput and startup across the given data sizes. Every metric is run
+with warmup and repeats (see PerformanceAnalyzer.benchmark), written to a
+JSON file, and compared against a stored baseline: the run fails if any
+median time regressed by more than the threshold.
+
+Usage: python -m benchmarks [--sizes 1000,10000,100000] [--suites sorting,csv,json,lending,startup]
+                            [--repeat 3] [--warmup 1] [--batch-ops 10000]
+                            [--output benchmark_results.json]
+                            [--baseline benchmarks/baseline.json] [--threshold 0.2] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from book import Book
+from data_generator import DataGenerator
+from data_handler import DataHandler
+from performance import PerformanceAnalyzer, summarize_samples
+from sorting import get_sorting_algorithms
+from storage import JsonStorage
+
+SUITES = ("sorting", "csv", "json", "lending", "startup")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Quadratic algorithms are skipped above this size
+INSERTION_SORT_MAX_ITEMS = 5000
+
+# Differences smaller than this are timer noise, never a regression
+MIN_REGRESSION_SECONDS = 0.001
+
+
+@contextmanager
+def working_directory(path):
+    """Run with path as the current directory, for code that uses relative data files"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def bench_sorting(analyzer, size):
+    books = DataHandler.get_sample_data(size, Book)
+    samples = {}
+    for name, algorithm in get_sorting_algorithms().items():
+        if name.startswith("Insertion") and size > INSERTION_SORT_MAX_ITEMS:
+            continue
+        samples[f"sorting/{name}/{size}"] = analyzer.benchmark(
+            lambda items: algorithm(items, "title"), setup=books.copy
+        )
+    return samples
+
+
+def bench_csv(analyzer, size, data_dir):
+    books = DataHandler.get_sample_data(size, Book)
+    filename = os.path.join(data_dir, f"books_{size}.csv")
+
+    def import_all():
+        for _ in DataHandler.stream_import_books(filename):
+            pass
+
+    return {
+        f"csv/export_books/{size}": analyzer.benchmark(
+            lambda: DataHandler.export_books_to_csv(books, filename)),
+        f"csv/import_books/{size}": analyzer.benchmark(import_all),
+    }
+
+
+def bench_json(analyzer, size, data_dir):
+    books, members, transactions = DataGenerator(books=size, members=size, transactions=size).generate()
+    storage = JsonStorage(*(os.path.join(data_dir, name) for name in (
+        "books.json", "members.json", "transactions.json", "library_journal.jsonl")))
+
+    return {
+        f"json/save/{size}": analyzer.benchmark(lambda: storage.compact(books, members, transactions)),
+        f"json/load/{size}": analyzer.benchmark(storage.load),
+    }
+
+
+def bench_lending(analyzer, size, data_dir, operations, batch_operations):
+    """
+    Borrow and return through LibraryService, journal and ID allocator included
+
+    Single loans are timed one pair at a time; batches go through
+    borrow_books/return_books with up to batch_operations distinct books.
+    """
+    from library_service import LibraryService
+
+    with working_directory(data_dir):
+        books, members, transactions = DataGenerator(
+            books=size, members=max(1, size // 10), transactions=size).generate()
+        system = LibraryService()
+        system.repository.add_books(books)
+        system.repository.add_members(members)
+        for transaction in transactions:
+            system.repository.add_transaction(transaction)
+        system.id_allocator.seed("transaction", len(transactions))
+        system.checkpoint()
+
+        available = [book for book in books if book.available]
+        pairs = [(available[i % len(available)], members[i % len(members)]) for i in range(operations)]
+
+        def borrow_and_return():
+            for book, member in pairs:
+                system.borrow_book(book.book_id, member.member_id)
+                system.return_book(book.book_id, member.member_id)
+
+        samples = {f"lending/borrow_return_{operations}/{size}": analyzer.benchmark(borrow_and_return)}
+
+        batch = [(book.book_id, members[i % len(members)].member_id)
+                 for i, book in enumerate(available[:batch_operations])]
+
+        def borrow_and_return_batch():
+            system.borrow_books(batch)
+            system.return_books(batch)
+
+        samples[f"lending/batch_borrow_return_{len(batch)}/{size}"] = analyzer.benchmark(borrow_and_return_batch)
+        system.close()
+    return samples
+
+
+def bench_startup(analyzer):
+    from benchmarks.startup import measure_startup
+
+    heavy_modules = set()
+
+    def measure():
+        result = measure_startup()
+        heavy_modules.update(result["heavy_modules_loaded"])
+        return result["total_import_ms"] / 1000
+
+    # Each run is a fresh interpreter, so the import time is measured directly
+    samples = [measure() for _ in range(max(1, analyzer.repeat))]
+    return {"startup/import": samples}, sorted(heavy_modules)
+
+
+def run_suites(suites, sizes, warmup, repeat, lending_operations, batch_operations):
+    analyzer = PerformanceAnalyzer(warmup=warmup, repeat=repeat)
+    samples = {}
+    failures = []
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for size in sizes:
+            if "sorting" in suites:
+                samples.update(bench_sorting(analyzer, size))
+            if "csv" in suites:
+                samples.update(bench_csv(analyzer, size, data_dir))
+            if "json" in suites:
+                samples.update(bench_json(analyzer, size, data_dir))
+            if "lending" in suites:
+                lending_dir = os.path.join(data_dir, f"lending_{size}")
+                os.mkdir(lending_dir)
+                samples.update(bench_lending(analyzer, size, lending_dir, lending_operations, batch_operations))
+
+    if "startup" in suites:
+        startup_samples, heavy_modules = bench_startup(analyzer)
+        samples.update(startup_samples)
+        if heavy_modules:
+            failures.append(f"heavy modules imported at startup: {', '.join(heavy_modules)}")
+
+    metrics = {name: summarize_samples(times) for name, times in samples.items()}
+    return metrics, failures
+
+
+def compare_to_baseline(metrics, baseline, threshold):
+    """Return a message for every metric whose median regressed beyond the threshold"""
+    regressions = []
+    for name, summary in metrics.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        current, reference = summary["median_time"], previous["median_time"]
+        if current > reference * (1 + threshold) and current - reference >= MIN_REGRESSION_SECONDS:
+            regressions.append(
+                f"{name}: median {current:.6f}s vs baseline {reference:.6f}s "
+                f"(+{(current / reference - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated data sizes (up to 1000000)")
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma-separated suites to run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per metric")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per metric")
+    parser.add_argument("--lending-ops", type=int, default=1000, help="borrow/return pairs per run")
+    parser.add_argument("--batch-ops", type=int, default=10000,
+                        help="borrow/return pairs per batch (capped at the available books)")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown of a median before failing (0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    suites = [suite.strip() for suite in args.suites.split(",")]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    metrics, failures = run_suites(suites, sizes, args.warmup, args.repeat, args.lending_ops, args.batch_ops)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "metrics": metrics,
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=4)
+
+    print(f"{'metric':<58} {'median':>12} {'p95':>12} {'stddev':>12}")
+    for name, summary in metrics.items():
+        print(f"{name:<58} {summary['median_time']:12.6f} {summary['p95_time']:12.6f} {summary['stddev']:12.6f}")
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=4)
+        print(f"Baseline updated: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            failures.extend(compare_to_baseline(metrics, json.load(file)["metrics"], args.threshold))
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Load test for the HTTP/JSON API server.
+
+Starts a local api_server.py on generated data (or targets a running one
+with --port), then runs concurrent keep-alive clients for a fixed time.
+Each request is a read (a book lookup or a search) or, with the given
+probability, a checkout: a borrow followed by a return of one of the
+client's own books. Reports requests per second, latency percentiles and
+the responses that were not successful.
+
+Usage: python -m benchmarks.load_test [--clients 50] [--duration 10] [--write-ratio 0.1]
+                                      [--books 10000] [--members 1000] [--storage json]
+                                      [--host 127.0.0.1] [--port PORT] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEARCH_TERMS = ("silent", "river", "gard", "kingdom", "smith", "tolkein", "winter", "lost empire")
+
+# Books and members fetched from the server to build requests from
+SAMPLE_LIMIT = 100000
+
+
+class HttpClient:
+    """A single keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, payload=None):
+        """Send a request, returns (status, decoded JSON body)"""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if not line.strip():
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        data = await self._reader.readexactly(length)
+        return status, json.loads(data) if data else None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+
+async def run_client(client, deadline, write_ratio, book_ids, own_books, member_id, latencies, failures, seed):
+    rng = random.Random(seed)
+
+    async def timed(method, path, payload=None):
+        start = time.perf_counter()
+        status, body = await client.request(method, path, payload)
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            failures[status] = failures.get(status, 0) + 1
+        return status
+
+    while time.perf_counter() < deadline:
+        if own_books and rng.random() < write_ratio:
+            loan = {"book_id": rng.choice(own_books), "member_id": member_id}
+            if await timed("POST", "/borrow", loan) == 200:
+                await timed("POST", "/return", loan)
+        elif rng.random() < 0.8:
+            await timed("GET", f"/books/{rng.choice(book_ids)}")
+        else:
+            await timed("GET", f"/search?q={rng.choice(SEARCH_TERMS).replace(' ', '+')}")
+    await client.close()
+
+
+async def run_load(host, port, clients, duration, write_ratio):
+    setup = HttpClient(host, port)
+    _, books = await setup.request("GET", f"/books?limit={SAMPLE_LIMIT}")
+    _, members = await setup.request("GET", f"/members?limit={SAMPLE_LIMIT}")
+    await setup.close()
+    if not books or not members:
+        raise SystemExit("The server has no books or members to test with")
+
+    book_ids = [book["book_id"] for book in books]
+    # Every client checks out its own books, so checkouts do not conflict with each other
+    available = [book["book_id"] for book in books if book["available"]]
+    latencies, failures = [], {}
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        run_client(HttpClient(host, port), deadline, write_ratio, book_ids, available[i::clients],
+                   members[i % len(members)]["member_id"], latencies, failures, seed=i)
+        for i in range(clients)
+    ))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, failures, elapsed, clients)
+
+
+def summarize(latencies, failures, elapsed, clients):
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    def percentile(fraction):
+        return ordered[max(0, math.ceil(fraction * count) - 1)] * 1000 if count else 0.0
+
+    return {
+        "clients": clients,
+        "requests": count,
+        "duration_s": elapsed,
+        "requests_per_second": count / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000 if count else 0.0,
+        "failures": {str(status): number for status, number in sorted(failures.items())},
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(data_dir, port, books, members, storage):
+    """Generate a dataset in data_dir and start api_server.py on it, returns the process"""
+    sys.path.insert(0, REPO_DIR)
+    from data_generator import DataGenerator
+
+    generator = DataGenerator(books=books, members=members, transactions=0)
+    if storage == "sqlite":
+        generator.write_sqlite(os.path.join(data_dir, "library.db"))
+    else:
+        generator.write_json(*(os.path.join(data_dir, name)
+                               for name in ("books.json", "members.json", "transactions.json")))
+
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, "api_server.py"), "--port", str(port), "--storage", storage],
+        cwd=data_dir, stdout=subprocess.PIPE, text=True)
+    # The server prints one line once it is listening
+    if not process.stdout.readline():
+        raise SystemExit("The API server did not start")
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="concurrent connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="share of requests that are checkouts")
+    parser.add_argument("--books", type=int, default=10000, help="books generated for a local server")
+    parser.add_argument("--members", type=int, default=1000, help="members generated for a local server")
+    parser.add_argument("--storage", choices=("json", "sqlite"), default="json", help="local server backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="port of a running server (default: start a local one)")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        process = None
+        port = args.port
+        if port is None:
+            port = free_port()
+            process = start_server(data_dir, port, args.books, args.members, args.storage)
+        try:
+            results = asyncio.run(run_load(args.host, port, args.clients, args.duration, args.write_ratio))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    print(f"{results['requests']} requests from {results['clients']} clients in {results['duration_s']:.1f}s")
+    print(f"Throughput: {results['requests_per_second']:.0f} requests/s")
+    print(f"Latency: p50 {results['p50_ms']:.2f} ms, p95 {results['p95_ms']:.2f} ms, "
+          f"p99 {results['p99_ms']:.2f} ms, max {results['max_ms']:.2f} ms")
+    if results["failures"]:
+        print(f"Failed responses by status: {results['failures']}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Memory benchmark: bytes per record for books, members and transactions.
+
+Compares plain ``__dict__`` objects (the previous model layout, with dates
+stored as ctime strings) against the slotted model classes and the columnar
+TransactionStore. Sizes are measured with tracemalloc.
+
+Usage: python -m benchmarks.memory [--records 100000]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from book import Book
+from member import Member
+from transaction import Transaction, TransactionStore
+
+
+class DictRecord:
+    """Stand-in for the previous, __dict__-based model classes"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def measure(build):
+    """Return (result, bytes allocated while building it)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def run(records):
+    now = int(time.time())
+    # Build the field values up front so only the record containers are measured
+    titles = [f"Title {i}" for i in range(records)]
+    isbns = [f"{9780000000000 + i}" for i in range(records)]
+    dates = [time.ctime(now - i) for i in range(records)]
+
+    cases = {
+        "Book (dict)": lambda: [
+            DictRecord(book_id=i, title=titles[i], author=titles[i], isbn=isbns[i], available=True)
+            for i in range(records)],
+        "Book (slots)": lambda: [
+            Book(i, titles[i], titles[i], isbns[i]) for i in range(records)],
+        "Member (dict)": lambda: [
+            DictRecord(member_id=i, name=titles[i], contact=isbns[i], borrowed_books=[])
+            for i in range(records)],
+        "Member (slots)": lambda: [
+            Member(i, titles[i], isbns[i]) for i in range(records)],
+        "Transaction (dict, ctime strings)": lambda: [
+            DictRecord(transaction_id=i, book_id=i, member_id=i, borrow_date=time.ctime(now - i),
+                       return_date=None, status="borrowed")
+            for i in range(records)],
+        "Transaction (slots, epoch seconds)": lambda: [
+            Transaction(i, i, i, dates[i]) for i in range(records)],
+        "Transaction (columnar store)": lambda: TransactionStore(
+            Transaction(i, i, i, dates[i]) for i in range(records)),
+    }
+
+    results = {}
+    for name, build in cases.items():
+        _, size = measure(build)
+        results[name] = size / records
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000, help="records to build per case")
+    args = parser.parse_args(argv)
+
+    print(f"Bytes per record ({args.records} records):")
+    for name, bytes_per_record in run(args.records).items():
+        print(f"  {name:<36} {bytes_per_record:8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
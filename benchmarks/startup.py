@@ -0,0 +1,85 @@
+"""
+Cold-start benchmark for the core lending path.
+
+Runs a fresh interpreter with ``python -X importtime``, reports where the
+import time goes, and fails if startup is over budget or if any of the heavy
+analysis dependencies were pulled in just to open the library.
+
+Usage: python -m benchmarks.startup [--budget-ms 150] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed for CSV import/export and performance analysis
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib")
+
+# Import the CLI and open the library, as a single borrow or menu display would
+STARTUP_SCRIPT = """
+import sys
+from main import LibraryManagementSystem
+LibraryManagementSystem()
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us) tuples"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_startup():
+    """Run the startup script in a fresh interpreter and an empty data directory"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ, PYTHONPATH=REPO_DIR)
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT.format(heavy=HEAVY_MODULES)],
+            cwd=data_dir, env=env, capture_output=True, text=True, check=True
+        )
+
+    entries = parse_importtime(completed.stderr)
+    loaded_heavy = [m for m in completed.stdout.strip().split(",") if m]
+    total_us = sum(self_us for _, self_us, _ in entries)
+    return {
+        "total_import_ms": total_us / 1000,
+        "modules": entries,
+        "heavy_modules_loaded": loaded_heavy,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="maximum total import time")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    args = parser.parse_args(argv)
+
+    result = measure_startup()
+
+    print(f"Total import time: {result['total_import_ms']:.1f} ms (budget {args.budget_ms:.1f} ms)")
+    print(f"\nSlowest {args.top} imports (cumulative):")
+    for module, _, cumulative_us in sorted(result["modules"], key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+
+    failures = []
+    if result["heavy_modules_loaded"]:
+        failures.append(f"heavy modules imported at startup: {', '.join(result['heavy_modules_loaded'])}")
+    if result["total_import_ms"] > args.budget_ms:
+        failures.append(f"startup import time {result['total_import_ms']:.1f} ms exceeds budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
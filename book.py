@@ -1,4 +1,6 @@
 class Book:
+    __slots__ = ("book_id", "title", "author", "isbn", "available")
+    
     def __init__(self, book_id, title, author, isbn, available=True):
         self.book_id = book_id
         
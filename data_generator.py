@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+
+from book import Book
+from member import Member
+from transaction import Transaction, TransactionStore
+
+# Word lists the generated titles and names are built from
+ADJECTIVES = ("Silent", "Hidden", "Lost", "Broken", "Golden", "Distant", "Secret", "Final",
+              "Burning", "Quiet", "Crimson", "Endless", "Forgotten", "Wild", "Frozen", "Last")
+NOUNS = ("River", "Garden", "Empire", "Shadow", "Kingdom", "Voyage", "Island", "Letter",
+         "Mountain", "Forest", "Harbor", "Winter", "Promise", "Mirror", "Storm", "Library",
+         "Station", "Orchard", "Compass", "Lantern")
+FIRST_NAMES = ("James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda",
+               "David", "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+               "Thomas", "Sarah", "Charles", "Karen", "Amir", "Sara", "Reza", "Maryam")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Rodriguez", "Martinez", "Wilson", "Anderson", "Taylor", "Thomas", "Moore", "Jackson",
+              "Martin", "Lee", "Thompson", "White", "Ahmadi", "Karimi", "Hosseini", "Rahimi")
+TITLES = [f"The {adjective} {noun}" for adjective in ADJECTIVES for noun in NOUNS]
+AUTHORS = [f"{first} {initial}. {last}"
+           for last in LAST_NAMES for first in FIRST_NAMES for initial in "ABCDEFGHJKLMNPRSTW"]
+
+DAY = 86400
+# Loans of the same book are spaced this far apart, so they never overlap
+LOAN_PERIOD = 21 * DAY
+MAX_LOAN_DURATION = 14 * DAY
+# Default end of the generated history (2025-01-01 00:00 UTC), fixed so runs are reproducible
+DEFAULT_NOW = 1735689600
+
+# Odd and not a multiple of 5, so book_id -> ISBN body is one-to-one below 10^9
+_ISBN_MULTIPLIER = 387420489
+
+
+class DataGenerator:
+    """
+    Seeded generator of consistent books, members and transaction histories.
+
+    Book and member popularity follow a Zipf distribution, so a few titles,
+    authors and members account for most of the loans. Every loan is a
+    transaction; loans of the same book never overlap in time, and the
+    books still on loan are unavailable and listed in their member's
+    borrowed books. The random draws are done with NumPy over whole
+    columns, and items are built and written in batches.
+    """
+
+    def __init__(self, books=1000, members=100, transactions=5000, seed=0,
+                 open_loan_ratio=0.1, zipf_exponent=1.1, batch_size=100000, now=None):
+        """
+        Args:
+            books, members, transactions: number of each to generate
+            seed: random seed; the same arguments always produce the same data
+            open_loan_ratio: share of borrowed books whose last loan is still open
+            zipf_exponent: skew of book popularity; titles, authors and members use half of it
+            batch_size: items built per batch when iterating or writing
+            now: epoch seconds the history ends at (default: DEFAULT_NOW)
+        """
+        self.book_count = books
+        self.member_count = members
+        self.transaction_count = transactions if books and members else 0
+        self.seed = seed
+        self.open_loan_ratio = open_loan_ratio
+        self.zipf_exponent = zipf_exponent
+        self.batch_size = batch_size
+        self.now = DEFAULT_NOW if now is None else now
+        self._plan = None
+
+    def _zipf_choice(self, rng, population, size, exponent):
+        """Draw size indices in range(population), popularity falling off as 1 / rank^exponent"""
+        import numpy as np
+
+        weights = 1.0 / np.arange(1, population + 1) ** exponent
+        # Shuffle ranks so the popular items are spread over the ID range
+        weights = weights[rng.permutation(population)]
+        return rng.choice(population, size=size, p=weights / weights.sum())
+
+    def _get_plan(self):
+        """Draw every column once; batches are then cut from these arrays"""
+        if self._plan is not None:
+            return self._plan
+
+        # Imported here so the CLI does not load NumPy until data is generated
+        import numpy as np
+
+        rng = np.random.default_rng(self.seed)
+        plan = {}
+
+        # Books: popular titles and prolific authors repeat, with a milder skew than loans
+        title_pool = max(1, self.book_count // 4)
+        author_pool = max(1, min(self.book_count // 20, len(AUTHORS)))
+        plan["title"] = self._zipf_choice(rng, title_pool, self.book_count, self.zipf_exponent / 2)
+        plan["author"] = self._zipf_choice(rng, author_pool, self.book_count, self.zipf_exponent / 2)
+
+        book_ids = np.arange(1, self.book_count + 1, dtype=np.int64)
+        body = (book_ids * _ISBN_MULTIPLIER) % 10 ** 9
+        digits = (978 * 10 ** 9 + body)[:, None] // 10 ** np.arange(11, -1, -1) % 10
+        check = (10 - (digits * np.tile([1, 3], 6)).sum(axis=1) % 10) % 10
+        plan["isbn_body"], plan["isbn_check"] = body, check
+
+        plan["first_name"] = rng.integers(0, len(FIRST_NAMES), self.member_count)
+        plan["last_name"] = rng.integers(0, len(LAST_NAMES), self.member_count)
+
+        # Transactions: popular books and active members get most of the loans
+        count = self.transaction_count
+        tx_books = self._zipf_choice(rng, max(1, self.book_count), count, self.zipf_exponent) + 1
+        tx_members = self._zipf_choice(rng, max(1, self.member_count), count, self.zipf_exponent / 2) + 1
+
+        # Number each book's loans in order, then lay them out back from now, LOAN_PERIOD apart
+        order = np.argsort(tx_books, kind="stable")
+        loans_per_book = np.bincount(tx_books, minlength=self.book_count + 1)
+        first_loan = np.concatenate(([0], np.cumsum(loans_per_book)[:-1]))
+        sequence = np.empty(count, dtype=np.int64)
+        sequence[order] = np.arange(count) - first_loan[tx_books[order]]
+        loans_after = loans_per_book[tx_books] - sequence
+
+        borrow_times = self.now - loans_after * LOAN_PERIOD + rng.integers(0, 6 * DAY, count)
+        return_times = borrow_times + rng.integers(DAY, MAX_LOAN_DURATION, count)
+
+        # A share of the books' most recent loans are still open
+        is_open = (loans_after == 1) & (rng.random(count) < self.open_loan_ratio)
+        return_times[is_open] = TransactionStore.NO_TIME
+
+        # Transaction IDs follow borrow time
+        by_time = np.argsort(borrow_times, kind="stable")
+        plan["tx_book"] = tx_books[by_time]
+        plan["tx_member"] = tx_members[by_time]
+        plan["tx_borrow"] = borrow_times[by_time]
+        plan["tx_return"] = return_times[by_time]
+
+        open_books = tx_books[is_open]
+        open_members = tx_members[is_open]
+        plan["available"] = np.ones(self.book_count + 1, dtype=bool)
+        plan["available"][open_books] = False
+
+        borrowed = {}
+        for member_id, book_id in zip(open_members.tolist(), open_books.tolist()):
+            borrowed.setdefault(member_id, []).append(book_id)
+        plan["borrowed"] = borrowed
+
+        self._plan = plan
+        return plan
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def iter_books(self):
+        """Yield lists of Book objects, batch_size at a time"""
+        plan = self._get_plan()
+
+        for start, end in self._batches(self.book_count):
+            yield [
+                Book(book_id,
+                     _numbered(TITLES, title),
+                     AUTHORS[author],
+                     f"978{body:09d}{check}",
+                     available)
+                for book_id, title, author, body, check, available in zip(
+                    range(start + 1, end + 1),
+                    plan["title"][start:end].tolist(),
+                    plan["author"][start:end].tolist(),
+                    plan["isbn_body"][start:end].tolist(),
+                    plan["isbn_check"][start:end].tolist(),
+                    plan["available"][start + 1:end + 1].tolist())
+            ]
+
+    def iter_members(self):
+        """Yield lists of Member objects, batch_size at a time"""
+        plan = self._get_plan()
+        borrowed = plan["borrowed"]
+
+        for start, end in self._batches(self.member_count):
+            batch = []
+            for member_id, first, last in zip(range(start + 1, end + 1),
+                                              plan["first_name"][start:end].tolist(),
+                                              plan["last_name"][start:end].tolist()):
+                first, last = FIRST_NAMES[first], LAST_NAMES[last]
+                contact = f"{first}.{last}{member_id}@example.com".lower()
+                batch.append(Member(member_id, f"{first} {last}", contact, list(borrowed.get(member_id, ()))))
+            yield batch
+
+    def iter_transactions(self):
+        """Yield lists of Transaction objects in borrow order, batch_size at a time"""
+        plan = self._get_plan()
+
+        for start, end in self._batches(self.transaction_count):
+            batch = []
+            for transaction_id, book_id, member_id, borrow_time, return_time in zip(
+                    range(start + 1, end + 1),
+                    plan["tx_book"][start:end].tolist(),
+                    plan["tx_member"][start:end].tolist(),
+                    plan["tx_borrow"][start:end].tolist(),
+                    plan["tx_return"][start:end].tolist()):
+                if return_time == TransactionStore.NO_TIME:
+                    transaction = Transaction(transaction_id, book_id, member_id, borrow_time=borrow_time)
+                else:
+                    transaction = Transaction(transaction_id, book_id, member_id, status="returned",
+                                              borrow_time=borrow_time, return_time=return_time)
+                batch.append(transaction)
+            yield batch
+
+    def generate(self):
+        """Return (books, members, transactions) as lists"""
+        return tuple(
+            [item for batch in batches for item in batch]
+            for batches in (self.iter_books(), self.iter_members(), self.iter_transactions())
+        )
+
+    def write_json(self, books_file="books.json", members_file="members.json",
+                   transactions_file="transactions.json"):
+        """Stream the data into JSON snapshot files that JsonStorage loads"""
+        for filename, batches in ((books_file, self.iter_books()),
+                                  (members_file, self.iter_members()),
+                                  (transactions_file, self.iter_transactions())):
+            with open(filename, 'w') as file:
+                file.write("[")
+                first = True
+                for batch in batches:
+                    for item in batch:
+                        file.write(("\n" if first else ",\n") + json.dumps(item.to_dict()))
+                        first = False
+                file.write("\n]\n")
+
+    def write_csv(self, books_file, members_file):
+        """Stream books and members into CSV files in the import format"""
+        from data_handler import DataHandler
+
+        book_rows = (
+            (book.book_id, book.title, book.author, book.isbn, book.available)
+            for batch in self.iter_books() for book in batch
+        )
+        DataHandler._write_csv_rows(
+            books_file, ['book_id', 'title', 'author', 'isbn', 'available'], book_rows)
+
+        member_rows = (
+            (member.member_id, member.name, member.contact, ','.join(map(str, member.borrowed_books)))
+            for batch in self.iter_members() for member in batch
+        )
+        DataHandler._write_csv_rows(
+            members_file, ['member_id', 'name', 'contact', 'borrowed_books'], member_rows)
+
+    def write_sqlite(self, database_file="library.db"):
+        """Stream the data into a SQLite database, one database transaction per batch"""
+        from storage import SqliteStorage
+
+        storage = SqliteStorage(database_file)
+        try:
+            for op, key, batches in (("import_books", "books", self.iter_books()),
+                                     ("import_members", "members", self.iter_members()),
+                                     ("import_transactions", "transactions", self.iter_transactions())):
+                for batch in batches:
+                    storage.append(op, {key: [item.to_dict() for item in batch]})
+        finally:
+            storage.close()
+
+
+def _numbered(pool, index):
+    """The pool entry for index, with a volume number once the pool is used up"""
+    name = pool[index % len(pool)]
+    volume = index // len(pool)
+    return f"{name} {volume + 1}" if volume else name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a consistent synthetic library dataset")
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--transactions", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=("json", "csv", "sqlite"), default="json",
+                        help="json: books/members/transactions.json snapshots, csv: books.csv and "
+                             "members.csv in the import format, sqlite: library.db")
+    args = parser.parse_args(argv)
+
+    generator = DataGenerator(books=args.books, members=args.members,
+                              transactions=args.transactions, seed=args.seed)
+    if args.format == "json":
+        generator.write_json()
+    elif args.format == "csv":
+        generator.write_csv(os.path.abspath("books.csv"), os.path.abspath("members.csv"))
+    else:
+        generator.write_sqlite()
+    print(f"Generated {args.books} books, {args.members} members and "
+          f"{generator.transaction_count} transactions ({args.format})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,21 @@
-import pandas as pd
+import csv
 import os
+from itertools import islice
 from book import Book
 from member import Member
+from utils import EMAIL_PATTERN, PHONE_PATTERN, save_data, load_data, normalize_isbn, normalize_contact
 
 class DataHandler:
+    BOOK_COLUMNS = ['title', 'author', 'isbn']
+    MEMBER_COLUMNS = ['name', 'contact']
+    
+    # What an import does with a row whose ISBN (books) or contact (members)
+    # is already in the catalog or earlier in the file
+    DUPLICATE_POLICIES = ('skip', 'update', 'reject')
+    # Rejection reason of rows dropped by the 'skip' policy (and rows
+    # superseded by a later one under 'update'), counted apart from invalid rows
+    DUPLICATE_SKIPPED = "Duplicate, skipped"
+    
     @staticmethod
     def get_default_data_dir():
         """Return the default directory for data files"""
@@ -27,41 +39,7 @@ class DataHandler:
                 - Must contain columns: 'title', 'author', 'isbn'
                 - Optional column: 'available' (boolean)
         """
-        books = []
-        try:
-            # Expand user directory if path contains ~
-            if '~' in filename:
-                filename = os.path.expanduser(filename)
-                
-            if not os.path.exists(filename):
-                print(f"File not found: {filename}")
-                return []
-                
-            df = pd.read_csv(filename)
-            required_columns = ['title', 'author', 'isbn']
-            
-            # Check if all required columns are present
-            if not all(col in df.columns for col in required_columns):
-                missing = [col for col in required_columns if col not in df.columns]
-                raise ValueError(f"CSV is missing required columns: {missing}")
-            
-            # Generate book IDs starting from max current ID + 1
-            next_id = 1
-            for index, row in df.iterrows():
-                book = Book(
-                    book_id=next_id,
-                    title=row['title'],
-                    author=row['author'],
-                    isbn=row['isbn'],
-                    available=True if 'available' not in df.columns else bool(row['available'])
-                )
-                books.append(book)
-                next_id += 1
-                
-            return books
-        except Exception as e:
-            print(f"Error importing books: {e}")
-            return []
+        return DataHandler.bulk_import_books(filename)[0]
     
     @staticmethod
     def import_members_from_csv(filename):
@@ -72,129 +50,397 @@ class DataHandler:
             filename: Path to the CSV file
                 - Must contain columns: 'name', 'contact'
         """
-        members = []
-        try:
-            # Expand user directory if path contains ~
-            if '~' in filename:
-                filename = os.path.expanduser(filename)
-                
-            if not os.path.exists(filename):
-                print(f"File not found: {filename}")
-                return []
-                
-            df = pd.read_csv(filename)
-            required_columns = ['name', 'contact']
-            
-            # Check if all required columns are present
-            if not all(col in df.columns for col in required_columns):
-                missing = [col for col in required_columns if col not in df.columns]
-                raise ValueError(f"CSV is missing required columns: {missing}")
+        return DataHandler.bulk_import_members(filename)[0]
+    
+    @staticmethod
+    def bulk_import_books(filename, verify_isbn_checksum=False, is_known_isbn=None, on_duplicate='skip'):
+        """
+        Import books from a CSV file, validating whole columns at once
+        
+        Args:
+            filename: Path to the CSV file (same columns as import_books_from_csv)
+            verify_isbn_checksum: also reject ISBNs whose check digit is wrong
+            is_known_isbn: optional predicate telling whether a normalized ISBN
+                is already in the catalog (e.g. LibraryRepository.has_isbn)
+            on_duplicate: 'skip', 'update' or 'reject' rows whose normalized ISBN
+                is known or appears earlier in the file. With 'update', rows
+                for known ISBNs are returned for the caller to merge, and of
+                repeated rows the last one wins.
+        
+        Returns:
+            (books, rejections) where rejections is a list of
+            {'line': CSV line number, 'reason': message} for skipped rows
+        
+        Raises:
+            OSError if the file cannot be read, ValueError if it is not a
+            CSV file with the required columns
+        """
+        df = DataHandler._read_csv_columns(filename, DataHandler.BOOK_COLUMNS)
+        return DataHandler._books_from_frame(df, verify_isbn_checksum, is_known_isbn, on_duplicate)
+    
+    @staticmethod
+    def bulk_import_members(filename, is_known_contact=None, on_duplicate='skip'):
+        """
+        Import members from a CSV file, validating whole columns at once
+        
+        Duplicates are detected on the normalized contact, with the same
+        is_known/on_duplicate handling as bulk_import_books.
+        
+        Returns:
+            (members, rejections) in the same format as bulk_import_books
+        
+        Raises:
+            OSError or ValueError, as bulk_import_books
+        """
+        df = DataHandler._read_csv_columns(filename, DataHandler.MEMBER_COLUMNS)
+        return DataHandler._members_from_frame(df, is_known_contact, on_duplicate)
+    
+    @staticmethod
+    def stream_import_books(filename, chunk_size=10000, progress=None, resume_file=None,
+                            verify_isbn_checksum=False, is_known_isbn=None, on_duplicate='skip'):
+        """
+        Import books from a CSV file in chunks, keeping memory use bounded
+        
+        Args:
+            filename: Path to the CSV file (same columns as import_books_from_csv)
+            chunk_size: number of rows read and validated at a time
+            progress: optional callback(rows_done, fraction_of_file)
+            resume_file: JSON file holding the committed row count per CSV file;
+                an earlier run of the same unchanged file continues after its last
+                committed chunk. None always starts from the first row.
+            verify_isbn_checksum: also reject ISBNs whose check digit is wrong
+            is_known_isbn, on_duplicate: duplicate handling, see bulk_import_books.
+                is_known_isbn is asked again for every chunk, so rows committed
+                from earlier chunks count as known.
+        
+        Yields:
+            (books, rejections) for each chunk, as returned by bulk_import_books.
+            A chunk counts as committed once the next one is requested.
+        """
+        return DataHandler._stream_csv(
+            filename, DataHandler.BOOK_COLUMNS, chunk_size, progress, resume_file,
+            lambda df: DataHandler._books_from_frame(df, verify_isbn_checksum, is_known_isbn, on_duplicate)
+        )
+    
+    @staticmethod
+    def stream_import_members(filename, chunk_size=10000, progress=None, resume_file=None,
+                              is_known_contact=None, on_duplicate='skip'):
+        """Import members from a CSV file in chunks, see stream_import_books"""
+        return DataHandler._stream_csv(
+            filename, DataHandler.MEMBER_COLUMNS, chunk_size, progress, resume_file,
+            lambda df: DataHandler._members_from_frame(df, is_known_contact, on_duplicate)
+        )
+    
+    @staticmethod
+    def _books_from_frame(df, verify_isbn_checksum=False, is_known_isbn=None, on_duplicate='skip'):
+        """Validate a DataFrame of book rows and build Book objects from the valid ones"""
+        import numpy as np
+        
+        isbn = df['isbn'].str.replace(r"[-\s]", "", regex=True)
+        title_len = df['title'].str.len()
+        author_len = df['author'].str.len()
+        
+        # First failing check wins, in this order
+        checks = [
+            (title_len.between(1, 100), "Title must be between 1 and 100 characters"),
+            (author_len.between(2, 50), "Author must be between 2 and 50 characters"),
+            (isbn.str.fullmatch(r"\d{13}|\d{9}[\dXx]"), "ISBN must be 10 or 13 digits"),
+        ]
+        if verify_isbn_checksum:
+            checks.append((DataHandler._isbn_checksum_mask(isbn), "ISBN check digit is invalid"))
+        
+        valid, rejections = DataHandler._apply_checks(df, checks)
+        valid, rejections = DataHandler._drop_duplicates(
+            df, isbn.map(normalize_isbn), valid, rejections, is_known_isbn, on_duplicate, "ISBN")
+        
+        if 'available' in df.columns:
+            available = ~df['available'].str.strip().str.lower().isin(['false', '0', 'no', 'n'])
+        else:
+            available = np.ones(len(df), dtype=bool)
+        
+        # Build objects straight from the column arrays of the valid rows
+        books = [
+            Book(book_id, title, author, isbn_value, bool(is_available))
+            for book_id, title, author, isbn_value, is_available in zip(
+                range(1, int(valid.sum()) + 1),
+                df['title'][valid], df['author'][valid], isbn[valid], np.asarray(available)[valid]
+            )
+        ]
+        return books, rejections
+    
+    @staticmethod
+    def _members_from_frame(df, is_known_contact=None, on_duplicate='skip'):
+        """Validate a DataFrame of member rows and build Member objects from the valid ones"""
+        contact = df['contact'].str.strip()
+        checks = [
+            (df['name'].str.len().between(2, 50), "Name must be between 2 and 50 characters"),
+            (contact.str.match(EMAIL_PATTERN) | contact.str.match(PHONE_PATTERN),
+             "Contact must be a valid email or 10-digit phone number"),
+        ]
+        valid, rejections = DataHandler._apply_checks(df, checks)
+        valid, rejections = DataHandler._drop_duplicates(
+            df, contact.map(normalize_contact), valid, rejections, is_known_contact, on_duplicate, "contact")
+        
+        members = [
+            Member(member_id, name, contact_value, [])
+            for member_id, name, contact_value in zip(
+                range(1, int(valid.sum()) + 1), df['name'][valid], contact[valid]
+            )
+        ]
+        return members, rejections
+    
+    @staticmethod
+    def _resolve_csv_path(filename):
+        """Expand ~ in an input path, raises FileNotFoundError if the file does not exist"""
+        # Expand user directory if path contains ~
+        if '~' in filename:
+            filename = os.path.expanduser(filename)
             
-            # Generate member IDs starting from max current ID + 1
-            next_id = 1
-            for index, row in df.iterrows():
-                member = Member(
-                    member_id=next_id,
-                    name=row['name'],
-                    contact=row['contact'],
-                    borrowed_books=[]
-                )
-                members.append(member)
-                next_id += 1
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"File not found: {filename}")
+        return filename
+    
+    @staticmethod
+    def _check_columns(df, required_columns):
+        # Check if all required columns are present
+        if not all(col in df.columns for col in required_columns):
+            missing = [col for col in required_columns if col not in df.columns]
+            raise ValueError(f"CSV is missing required columns: {missing}")
+    
+    @staticmethod
+    def _read_csv_columns(filename, required_columns):
+        """Read a CSV as strings and check the required columns"""
+        filename = DataHandler._resolve_csv_path(filename)
+        
+        import pandas as pd
+        # Read everything as text so ISBNs keep leading zeros and empty cells stay ''
+        df = pd.read_csv(filename, dtype=str, keep_default_na=False)
+        DataHandler._check_columns(df, required_columns)
+        return df
+    
+    @staticmethod
+    def _stream_csv(filename, required_columns, chunk_size, progress, resume_file, build):
+        """Generator behind the stream_import_* functions"""
+        filename = DataHandler._resolve_csv_path(filename)
+        
+        # Progress is only reused if the file has not changed since it was recorded
+        key = os.path.abspath(filename)
+        stat = os.stat(filename)
+        signature = {"size": stat.st_size, "mtime": stat.st_mtime}
+        committed_rows = 0
+        if resume_file:
+            checkpoint = DataHandler._load_checkpoints(resume_file).get(key)
+            if checkpoint and checkpoint.get("file") == signature:
+                committed_rows = checkpoint["rows"]
+        
+        import pandas as pd
+        rows_done = committed_rows
+        with open(filename, 'rb') as handle:
+            reader = pd.read_csv(
+                handle, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                skiprows=range(1, committed_rows + 1)
+            )
+            for df in reader:
+                DataHandler._check_columns(df, required_columns)
+                # Keep row numbers relative to the whole file for the rejection report
+                df.index = df.index + committed_rows
+                
+                yield build(df)
                 
-            return members
-        except Exception as e:
-            print(f"Error importing members: {e}")
-            return []
+                # The consumer asked for the next chunk, so this one is committed
+                rows_done += len(df)
+                if resume_file and not DataHandler._save_checkpoint(
+                        resume_file, key, {"file": signature, "rows": rows_done}):
+                    # The import itself is fine, it just cannot be resumed
+                    resume_file = None
+                if progress:
+                    progress(rows_done, handle.tell() / max(stat.st_size, 1))
+        
+        if resume_file:
+            DataHandler._save_checkpoint(resume_file, key, None)
     
     @staticmethod
-    def export_books_to_csv(books, filename):
-        """Export books to a CSV file"""
+    def _load_checkpoints(resume_file):
+        """Committed rows per CSV path, empty if the file is missing or unreadable"""
         try:
-            # Expand user directory if path contains ~
-            if '~' in filename:
-                filename = os.path.expanduser(filename)
-                
-            # If no directory specified, use the default data directory
-            if os.path.basename(filename) == filename:
-                data_dir = DataHandler.get_default_data_dir()
-                filename = os.path.join(data_dir, filename)
-            
-            data = []
-            for book in books:
-                data.append({
-                    'book_id': book.book_id,
-                    'title': book.title,
-                    'author': book.author,
-                    'isbn': book.isbn,
-                    'available': book.available
-                })
-            
-            df = pd.DataFrame(data)
-            df.to_csv(filename, index=False)
-            return True
-        except Exception as e:
-            print(f"Error exporting books: {e}")
-            return False
+            checkpoints = load_data(resume_file)
+        except (OSError, ValueError):
+            return {}
+        return checkpoints if isinstance(checkpoints, dict) else {}
     
     @staticmethod
-    def export_members_to_csv(members, filename):
-        """Export members to a CSV file"""
+    def _save_checkpoint(resume_file, key, checkpoint):
+        """Record (or with None, forget) one CSV's progress, returns False if it cannot be written"""
+        checkpoints = DataHandler._load_checkpoints(resume_file)
+        if checkpoint is None:
+            checkpoints.pop(key, None)
+        else:
+            checkpoints[key] = checkpoint
         try:
-            # Expand user directory if path contains ~
-            if '~' in filename:
-                filename = os.path.expanduser(filename)
-                
-            # If no directory specified, use the default data directory
-            if os.path.basename(filename) == filename:
-                data_dir = DataHandler.get_default_data_dir()
-                filename = os.path.join(data_dir, filename)
-            
-            data = []
-            for member in members:
-                data.append({
-                    'member_id': member.member_id,
-                    'name': member.name,
-                    'contact': member.contact,
-                    'borrowed_books': ','.join(map(str, member.borrowed_books))
-                })
-            
-            df = pd.DataFrame(data)
-            df.to_csv(filename, index=False)
-            return True
-        except Exception as e:
-            print(f"Error exporting members: {e}")
+            if checkpoints:
+                save_data(checkpoints, resume_file)
+            elif os.path.exists(resume_file):
+                os.remove(resume_file)
+        except OSError:
             return False
+        return True
+    
+    @staticmethod
+    def _apply_checks(df, checks):
+        """Combine (mask, reason) checks into a valid-row mask and a rejection report"""
+        import numpy as np
+        
+        masks = [np.asarray(mask.fillna(False), dtype=bool) for mask, _ in checks]
+        valid = np.logical_and.reduce(masks) if masks else np.ones(len(df), dtype=bool)
+        
+        rejected = np.flatnonzero(~valid)
+        if not len(rejected):
+            return valid, []
+        
+        # Pick the reason of the first failing check for each rejected row
+        failed = np.stack([~mask[rejected] for mask in masks])
+        reasons = np.array([reason for _, reason in checks])[failed.argmax(axis=0)]
+        
+        # Line 1 is the header, so data row i is on line i + 2
+        rejections = [
+            {'line': int(row) + 2, 'reason': str(reason)}
+            for row, reason in zip(df.index[rejected], reasons)
+        ]
+        return valid, rejections
+    
+    @staticmethod
+    def _drop_duplicates(df, keys, valid, rejections, is_known, on_duplicate, label):
+        """
+        Apply a duplicate policy to the valid rows in one pass over their keys
+        
+        A row is a duplicate if its normalized key is already known or was
+        seen on an earlier valid row ('update' keeps the last row instead).
+        Returns the narrowed valid mask and the rejections with the dropped
+        rows added, in line order.
+        """
+        import numpy as np
+        
+        if on_duplicate not in DataHandler.DUPLICATE_POLICIES:
+            raise ValueError(f"on_duplicate must be one of {DataHandler.DUPLICATE_POLICIES}")
+        
+        rows = np.flatnonzero(valid)
+        valid_keys = keys.iloc[rows]
+        repeated = valid_keys.duplicated(keep='last' if on_duplicate == 'update' else 'first').to_numpy()
+        known = np.zeros(len(rows), dtype=bool)
+        if is_known is not None and on_duplicate != 'update':
+            known = np.fromiter(map(is_known, valid_keys), dtype=bool, count=len(rows))
+        
+        dropped = repeated | known
+        if not dropped.any():
+            return valid, rejections
+        
+        valid = valid.copy()
+        valid[rows[dropped]] = False
+        for row, is_repeat in zip(df.index[rows[dropped]], repeated[dropped]):
+            if on_duplicate == 'reject':
+                where = "repeated in the file" if is_repeat else "already in the catalog"
+                reason = f"Duplicate {label}, {where}"
+            else:
+                reason = DataHandler.DUPLICATE_SKIPPED
+            rejections.append({'line': int(row) + 2, 'reason': reason})
+        rejections.sort(key=lambda rejection: rejection['line'])
+        return valid, rejections
+    
+    @staticmethod
+    def _isbn_checksum_mask(isbn):
+        """Vectorized ISBN-10/ISBN-13 check digit validation over a string Series"""
+        import numpy as np
+        import pandas as pd
+        
+        values = isbn.str.upper()
+        result = np.zeros(len(values), dtype=bool)
+        
+        for length, pattern, weights, modulus in (
+            (13, r"\d{13}", np.array([1, 3] * 6 + [1]), 10),
+            (10, r"\d{9}[\dX]", np.arange(10, 0, -1), 11),
+        ):
+            rows = np.flatnonzero(values.str.fullmatch(pattern).to_numpy(dtype=bool))
+            if not len(rows):
+                continue
+            # View the ASCII bytes as a (rows, length) matrix of digit values
+            raw = np.array(values.iloc[rows].tolist(), dtype=f"S{length}")
+            digits = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(-1, length).astype(np.int64) - ord('0')
+            digits[digits == ord('X') - ord('0')] = 10
+            result[rows] = (digits * weights).sum(axis=1) % modulus == 0
+        
+        return pd.Series(result, index=isbn.index)
+    
+    @staticmethod
+    def export_books_to_csv(books, filename, progress=None):
+        """
+        Export books to a CSV file, writing rows as they are produced
+        
+        Returns the number of rows written; raises OSError if the file
+        cannot be written.
+        """
+        rows = (
+            (book.book_id, book.title, book.author, book.isbn, book.available)
+            for book in books
+        )
+        return DataHandler._write_csv_rows(
+            filename, ['book_id', 'title', 'author', 'isbn', 'available'], rows, progress
+        )
+    
+    @staticmethod
+    def export_members_to_csv(members, filename, progress=None):
+        """Export members to a CSV file, see export_books_to_csv"""
+        rows = (
+            (member.member_id, member.name, member.contact,
+             ','.join(map(str, member.borrowed_books)))
+            for member in members
+        )
+        return DataHandler._write_csv_rows(
+            filename, ['member_id', 'name', 'contact', 'borrowed_books'], rows, progress
+        )
+    
+    @staticmethod
+    def _write_csv_rows(filename, header, rows, progress=None, chunk_size=10000):
+        """Write rows to a CSV file in batches, so memory use does not grow with the data"""
+        # Expand user directory if path contains ~
+        if '~' in filename:
+            filename = os.path.expanduser(filename)
+            
+        # If no directory specified, use the default data directory
+        if os.path.basename(filename) == filename:
+            data_dir = DataHandler.get_default_data_dir()
+            filename = os.path.join(data_dir, filename)
+        
+        rows_written = 0
+        with open(filename, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            while True:
+                batch = list(islice(rows, chunk_size))
+                if not batch:
+                    break
+                writer.writerows(batch)
+                rows_written += len(batch)
+                if progress:
+                    progress(rows_written)
+        return rows_written
             
     @staticmethod
-    def get_sample_data(size, class_type):
-        """Generate sample data for performance testing"""
-        import random
-        import string
+    def get_sample_data(size, class_type, seed=0):
+        """
+        Generate sample data for performance testing
+        
+        Uses the seeded DataGenerator, so the same size and seed always give
+        the same items, with borrowed books and availability that match a
+        generated loan history.
+        """
+        from data_generator import DataGenerator
         
         if class_type == Book:
-            items = []
-            for i in range(size):
-                # Generate random book data
-                title = ''.join(random.choices(string.ascii_letters, k=10))
-                author = ''.join(random.choices(string.ascii_letters, k=8))
-                isbn = ''.join(random.choices(string.digits, k=13))
-                available = random.choice([True, False])
-                
-                book = Book(i+1, title, author, isbn, available)
-                items.append(book)
-            return items
+            generator = DataGenerator(books=size, members=max(1, size // 10), transactions=size, seed=seed)
+            return [book for batch in generator.iter_books() for book in batch]
         
         elif class_type == Member:
-            items = []
-            for i in range(size):
-                # Generate random member data
-                name = ''.join(random.choices(string.ascii_letters, k=8))
-                contact = ''.join(random.choices(string.digits, k=10))
-                borrowed = random.sample(range(1, size//2 + 1), random.randint(0, min(5, size//10)))
-                
-                member = Member(i+1, name, contact, borrowed)
-                items.append(member)
-            return items
+            generator = DataGenerator(books=size, members=size, transactions=size, seed=seed)
+            return [member for batch in generator.iter_members() for member in batch]
         
         return []
@@ -0,0 +1,59 @@
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; msvcrt locks a byte range instead
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive, non-blocking lock on a file shared by every process using the same data.
+
+    The operating system releases the lock when the file is closed or the
+    process exits, so a crash never leaves the data locked.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = None
+
+    def acquire(self):
+        """Take the lock, returns False if another process holds it"""
+        file = open(self.filename, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            file.close()
+            return False
+
+        # Record the owner, for the error shown to the next process
+        file.seek(0)
+        file.truncate()
+        file.write(str(os.getpid()))
+        file.flush()
+        self._file = file
+        return True
+
+    def owner(self):
+        """Process ID written by the current holder, or None if unknown"""
+        try:
+            with open(self.filename) as file:
+                return int(file.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is None:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
@@ -0,0 +1,33 @@
+from utils import save_data, load_data
+
+
+class IdAllocator:
+    """
+    Persistent monotonic ID sequences, one per entity type.
+
+    IDs are never reused, even after the item with the highest ID is removed,
+    and allocating one does not require scanning the collection.
+    """
+
+    def __init__(self, filename="sequences.json"):
+        self.filename = filename
+        self.sequences = load_data(filename) or {}
+
+    def seed(self, entity, current_max):
+        """Make sure the sequence is past IDs that already exist in the data"""
+        if current_max > self.sequences.get(entity, 0):
+            self.sequences[entity] = current_max
+            self._save()
+
+    def next_id(self, entity):
+        return self.reserve(entity, 1)[0]
+
+    def reserve(self, entity, count):
+        """Reserve a block of consecutive IDs, returns them as a range"""
+        start = self.sequences.get(entity, 0) + 1
+        self.sequences[entity] = start + count - 1
+        self._save()
+        return range(start, start + count)
+
+    def _save(self):
+        save_data(self.sequences, self.filename)
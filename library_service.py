@@ -0,0 +1,531 @@
+import os
+import time
+
+from book import Book
+from member import Member
+from transaction import Transaction
+from utils import validate_isbn, validate_name, validate_contact, validate_title, validate_author
+from sorting import DEFAULT_SORTING_ALGORITHM, get_sorting_algorithms, top_k
+from performance import PerformanceAnalyzer
+from data_handler import DataHandler
+from storage import get_storage_backend
+from repository import LibraryRepository
+from id_allocator import IdAllocator
+from file_lock import FileLock
+from search_index import SearchIndex
+
+
+class LibraryError(Exception):
+    """Base class of the errors raised by LibraryService"""
+
+
+class ValidationError(LibraryError):
+    """An argument is malformed, e.g. an invalid ISBN or an unknown sort key"""
+
+
+class NotFoundError(LibraryError):
+    """No book or member has the given ID"""
+
+
+class LoanError(LibraryError):
+    """A borrow or return is not possible in the current state"""
+
+
+class DataFileError(LibraryError):
+    """A CSV file could not be read or written"""
+
+
+class StorageLockedError(LibraryError):
+    """The data files are already open in another process"""
+
+
+class LibraryService:
+    """
+    Library operations without any terminal input or output.
+
+    Every method takes plain arguments, returns values and raises a
+    LibraryError subclass when the operation is not possible, so the
+    library can be driven by the menu in main.py, scripts, benchmarks or
+    other processes alike.
+    """
+
+    SEARCH_RESULTS = 10
+    # Data sizes used by analyze_sorting
+    ANALYSIS_SIZES = (10, 100, 500, 1000)
+
+    MAINTAINED_INDEX = "Maintained Index (no re-sort)"
+    DATABASE_QUERY = "Database Query (ORDER BY)"
+
+    def __init__(self, storage="json"):
+        # Load the data through the selected backend ('json' or 'sqlite')
+        self.storage = get_storage_backend(storage)
+        # One process at a time: a second one would reuse IDs and overwrite the journal and snapshots
+        self._lock = FileLock(self.storage.lock_file)
+        if not self._lock.acquire():
+            self.storage.close()
+            owner = self._lock.owner()
+            raise StorageLockedError(
+                f"The library data is already open in another process"
+                f"{f' (PID {owner})' if owner else ''}; close it first. Lock file: {self._lock.filename}")
+        self.repository = LibraryRepository(
+            *self.storage.load(), search_index=SearchIndex.load(self.storage.search_index_file))
+
+        # ID sequences are persisted; seeding covers data written without them
+        self.id_allocator = IdAllocator()
+        self.id_allocator.seed("book", max((b.book_id for b in self.books), default=0))
+        self.id_allocator.seed("member", max((m.member_id for m in self.members), default=0))
+        self.id_allocator.seed("transaction", self.storage.max_id("transactions") if self.storage.supports_queries
+                               else max((t.transaction_id for t in self.transactions), default=0))
+
+        self.sorting_algorithms = get_sorting_algorithms()
+        self.sorting_algorithms[self.MAINTAINED_INDEX] = self._indexed_sort
+        if self.storage.supports_queries:
+            self.sorting_algorithms[self.DATABASE_QUERY] = self._database_sort
+        self.performance_analyzer = PerformanceAnalyzer()
+
+    @property
+    def books(self):
+        return self.repository.books
+
+    @property
+    def members(self):
+        return self.repository.members
+
+    @property
+    def transactions(self):
+        """Transactions in memory: the whole history with JSON, only open loans and this session's with SQLite"""
+        return self.repository.transactions
+
+    # Persistence: every mutation is journaled; full snapshots are only written on compaction
+    def _commit(self, op, data):
+        self.storage.append(op, data)
+        if self.storage.needs_compaction():
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write a full snapshot and the search index"""
+        self.storage.compact(self.books, self.members, self.transactions)
+        self.save_search_index()
+
+    def save_search_index(self):
+        if self.repository.search_index.dirty:
+            self.repository.search_index.save()
+
+    def close(self):
+        """Compact pending journal entries and release the storage"""
+        if self.storage.pending_entries:
+            self.checkpoint()
+        else:
+            self.save_search_index()
+        self.storage.close()
+        self._lock.release()
+
+    # Books and members
+    def add_book(self, title, author, isbn):
+        if not validate_title(title):
+            raise ValidationError("Invalid title format. Must be between 1 and 100 characters.")
+        if not validate_author(author):
+            raise ValidationError("Invalid author format. Use only letters, spaces, and common "
+                                  "punctuation (length: 2-50 characters).")
+        if not validate_isbn(isbn):
+            raise ValidationError("Invalid ISBN format. Must be 10 or 13 digits.")
+
+        book_id = self.id_allocator.next_id("book")
+        book = self.repository.add_book(Book(book_id, title, author, isbn))
+        self._commit("add_book", book.to_dict())
+        return book
+
+    def add_member(self, name, contact):
+        if not validate_name(name):
+            raise ValidationError("Invalid name format. Use only letters and spaces (length: 2-50 characters).")
+        if not validate_contact(contact):
+            raise ValidationError("Invalid contact format. Enter a valid email or 10-digit phone number.")
+
+        member_id = self.id_allocator.next_id("member")
+        member = self.repository.add_member(Member(member_id, name, contact))
+        self._commit("add_member", member.to_dict())
+        return member
+
+    def get_book(self, book_id):
+        book = self.repository.get_book(book_id)
+        if book is None:
+            raise NotFoundError(f"No book with ID {book_id}.")
+        return book
+
+    def get_member(self, member_id):
+        member = self.repository.get_member(member_id)
+        if member is None:
+            raise NotFoundError(f"No member with ID {member_id}.")
+        return member
+
+    def list_books(self, offset=0, limit=None):
+        return self._page(self.books, offset, limit)
+
+    def list_members(self, offset=0, limit=None):
+        return self._page(self.members, offset, limit)
+
+    # With a queryable backend the transaction history is read from storage a page at a time
+    def list_transactions(self, offset=0, limit=None):
+        if self.storage.supports_queries:
+            return self.storage.transactions(limit=limit, offset=offset)
+        return self._page(self.transactions, offset, limit)
+
+    def transaction_count(self):
+        if self.storage.supports_queries:
+            return self.storage.count("transactions")
+        return len(self.transactions)
+
+    def loans_for_book(self, book_id, offset=0, limit=None):
+        """Transactions of one book, oldest first"""
+        self.get_book(book_id)
+        if self.storage.supports_queries:
+            return self.storage.transactions(where={"book_id": book_id}, limit=limit, offset=offset)
+        return self._page(self.repository.loans_for_book(book_id), offset, limit)
+
+    def loans_for_member(self, member_id, offset=0, limit=None):
+        """Transactions of one member, oldest first"""
+        self.get_member(member_id)
+        if self.storage.supports_queries:
+            return self.storage.transactions(where={"member_id": member_id}, limit=limit, offset=offset)
+        return self._page(self.repository.loans_for_member(member_id), offset, limit)
+
+    def borrowed_books(self, member_id):
+        """Books currently on loan to a member"""
+        return [self.repository.get_book(book_id) for book_id in self.get_member(member_id).borrowed_books]
+
+    def search_books(self, query, limit=SEARCH_RESULTS):
+        """Return up to limit (book, score) pairs, best match first"""
+        if not query.strip():
+            raise ValidationError("Please enter at least one word.")
+        return self.repository.search_books(query, limit)
+
+    def _page(self, items, offset, limit):
+        return items[offset:] if limit is None else items[offset:offset + limit]
+
+    # Loans
+    def borrow_book(self, book_id, member_id):
+        """Lend a book to a member, returns the new Transaction"""
+        book = self.get_book(book_id)
+        member = self.get_member(member_id)
+        if not book.available:
+            raise LoanError("This book is not available for borrowing.")
+
+        transaction_id = self.id_allocator.next_id("transaction")
+        transaction = Transaction(transaction_id, book.book_id, member.member_id)
+        self.repository.add_transaction(transaction)
+
+        book.update_availability(False)
+        member.borrow_book(book.book_id)
+        self.repository.refresh_member(member)
+
+        self._commit("borrow", {
+            "transaction": transaction.to_dict(),
+            "book_id": book.book_id,
+            "member_id": member.member_id
+        })
+        return transaction
+
+    def return_book(self, book_id, member_id):
+        """Close a member's loan of a book, returns the closed Transaction (None for loans without one)"""
+        book = self.get_book(book_id)
+        member = self.get_member(member_id)
+        if book.book_id not in member.borrowed_books:
+            raise LoanError(f"Book {book_id} is not borrowed by {member.name}.")
+
+        transaction = self.repository.get_open_loan(book.book_id, member.member_id)
+        if transaction:
+            self.repository.close_loan(transaction)
+
+        book.update_availability(True)
+        member.return_book(book.book_id)
+        self.repository.refresh_member(member)
+
+        self._commit("return", {
+            "transaction": transaction.to_dict() if transaction else None,
+            "book_id": book.book_id,
+            "member_id": member.member_id
+        })
+        return transaction
+
+    def borrow_books(self, operations, all_or_nothing=False):
+        """
+        Borrow many books in one batch, from (book_id, member_id) pairs
+
+        Every pair is validated against the indexes and the pairs before it
+        in the batch, then the valid ones are applied together and persisted
+        as a single journal entry. With all_or_nothing, one invalid pair
+        leaves the whole batch unapplied.
+
+        Returns one result dict per pair, in order: book_id, member_id,
+        success, and transaction_id or error.
+        """
+        return self._apply_loan_batch(operations, True, all_or_nothing)
+
+    def return_books(self, operations, all_or_nothing=False):
+        """Return many books in one batch; see borrow_books"""
+        return self._apply_loan_batch(operations, False, all_or_nothing)
+
+    def _apply_loan_batch(self, operations, borrowing, all_or_nothing):
+        results, accepted = self._validate_loan_batch(operations, borrowing)
+        if not accepted or (all_or_nothing and len(accepted) < len(results)):
+            if all_or_nothing:
+                for result in results:
+                    if result["success"]:
+                        result.update(success=False, error="Batch not applied")
+            return results
+
+        if borrowing:
+            transaction_ids = self.id_allocator.reserve("transaction", len(accepted))
+
+        transactions = []
+        changed_members = {}
+        for position, (result, book, member) in enumerate(accepted):
+            if borrowing:
+                transaction = Transaction(transaction_ids[position], book.book_id, member.member_id)
+                self.repository.add_transaction(transaction)
+                book.update_availability(False)
+                member.borrow_book(book.book_id)
+            else:
+                transaction = self.repository.get_open_loan(book.book_id, member.member_id)
+                if transaction:
+                    self.repository.close_loan(transaction)
+                book.update_availability(True)
+                member.return_book(book.book_id)
+            if transaction:
+                transactions.append(transaction.to_dict())
+                result["transaction_id"] = transaction.transaction_id
+            changed_members[member.member_id] = member
+
+        for member in changed_members.values():
+            self.repository.refresh_member(member)
+
+        self._commit("borrow_batch" if borrowing else "return_batch", {
+            "transactions": transactions,
+            "loans": [[book.book_id, member.member_id] for _, book, member in accepted]
+        })
+        return results
+
+    def _validate_loan_batch(self, operations, borrowing):
+        """Check each pair, returns (results, [(result, book, member) for the valid pairs])"""
+        results, accepted = [], []
+        # Who holds a book after the pairs accepted so far (None: on the shelf)
+        holders = {}
+
+        for book_id, member_id in operations:
+            result = {"book_id": book_id, "member_id": member_id, "success": False}
+            results.append(result)
+            book = self.repository.get_book(book_id)
+            member = self.repository.get_member(member_id)
+
+            if book is None:
+                result["error"] = "Invalid book ID"
+            elif member is None:
+                result["error"] = "Invalid member ID"
+            elif borrowing:
+                available = holders[book_id] is None if book_id in holders else book.available
+                if not available:
+                    result["error"] = "Book is not available for borrowing"
+            else:
+                held = holders[book_id] == member_id if book_id in holders else book_id in member.borrowed_books
+                if not held:
+                    result["error"] = "Book is not borrowed by this member"
+
+            if "error" not in result:
+                result["success"] = True
+                holders[book_id] = member_id if borrowing else None
+                accepted.append((result, book, member))
+
+        return results, accepted
+
+    # Sorting
+    def sort(self, kind, primary_key, secondary_keys=None, algorithm=DEFAULT_SORTING_ALGORITHM, record=True):
+        """
+        Sort all books or members with one of sorting_algorithms
+
+        Unless record is False, the run is recorded by the performance
+        analyzer. Returns a dict with the sorted items, the algorithm, the
+        one Auto selected and the input profile behind it (or None) and the
+        execution time in seconds.
+        """
+        items = self._sortable(kind, primary_key)
+        sort_func = self.sorting_algorithms.get(algorithm)
+        if sort_func is None:
+            raise ValidationError(f"Unknown sorting algorithm: {algorithm}")
+
+        items_copy = items.copy()
+        start = time.perf_counter_ns()
+        sort_func(items_copy, primary_key, secondary_keys)
+        execution_time = (time.perf_counter_ns() - start) / 1e9
+
+        # Record the sort that was just done instead of running it again
+        selected = getattr(sort_func, "last_choice", None)
+        if record:
+            self.performance_analyzer.record_run(algorithm, len(items), secondary_keys, execution_time, selected)
+        return {
+            "items": items_copy,
+            "algorithm": algorithm,
+            "selected_algorithm": selected,
+            "profile": getattr(sort_func, "last_profile", None),
+            "execution_time": execution_time,
+        }
+
+    def sort_page(self, kind, primary_key, secondary_keys=None, offset=0, limit=20):
+        """One page of the sorted order, computed with a bounded heap instead of a full sort"""
+        return top_k(self._sortable(kind, primary_key), limit, primary_key, secondary_keys, offset)
+
+    def indexed_page(self, kind, primary_key, secondary_keys=None, offset=0, limit=20):
+        """One page of the sorted order read from the maintained sorted index, O(offset + limit) once it is built"""
+        self._sortable(kind, primary_key)
+        if kind == "books":
+            return self.repository.sorted_books(primary_key, secondary_keys, offset + limit)[offset:]
+        return self.repository.sorted_members(primary_key, secondary_keys, offset + limit)[offset:]
+
+    def _sortable(self, kind, primary_key):
+        if kind == "books":
+            items, keys = self.books, LibraryRepository.BOOK_SORT_KEYS
+        elif kind == "members":
+            items, keys = self.members, LibraryRepository.MEMBER_SORT_KEYS
+        else:
+            raise ValidationError(f"Cannot sort {kind}; use 'books' or 'members'.")
+        if primary_key not in keys:
+            raise ValidationError(f"Cannot sort {kind} by {primary_key}.")
+        return items
+
+    def _indexed_sort(self, items, primary_key, secondary_keys=None):
+        """Read books or members in order from the repository's maintained sorted index"""
+        if items and isinstance(items[0], Book):
+            items[:] = self.repository.sorted_books(primary_key, secondary_keys)
+        else:
+            items[:] = self.repository.sorted_members(primary_key, secondary_keys)
+        return items
+
+    def _database_sort(self, items, primary_key, secondary_keys=None):
+        """Sort books or members with the storage backend's ORDER BY"""
+        if items and isinstance(items[0], Book):
+            ids = self.storage.sorted_ids("books", primary_key, secondary_keys)
+            lookup = self.repository.get_book
+        else:
+            ids = self.storage.sorted_ids("members", primary_key, secondary_keys)
+            lookup = self.repository.get_member
+        items[:] = [lookup(item_id) for item_id in ids]
+        return items
+
+    # CSV import and export
+    def import_csv(self, kind, filename, on_duplicate="skip", progress=None, verify_isbn_checksum=False):
+        """
+        Import books or members from a CSV file, committing each chunk as it is read
+
+        With verify_isbn_checksum, book rows whose ISBN check digit is wrong
+        are rejected as well. Returns a summary dict: imported, updated, skipped (duplicates),
+        rejected (invalid rows) and rejections (the first 10, with line and
+        reason). Raises DataFileError if the file cannot be read; chunks
+        committed before the error stay imported, and importing the same
+        unchanged file into this library again resumes after them.
+        """
+        if kind not in ("books", "members"):
+            raise ValidationError(f"Cannot import {kind}; use 'books' or 'members'.")
+        if on_duplicate not in DataHandler.DUPLICATE_POLICIES:
+            raise ValidationError(f"Unknown duplicate policy: {on_duplicate}")
+        if '~' in filename:
+            filename = os.path.expanduser(filename)
+        if not os.path.exists(filename):
+            raise DataFileError(f"File '{filename}' not found.")
+
+        merge = on_duplicate == "update"
+        if kind == "books":
+            chunks = DataHandler.stream_import_books(
+                filename, progress=progress, resume_file=self.storage.import_progress_file,
+                verify_isbn_checksum=verify_isbn_checksum, is_known_isbn=self.repository.has_isbn, on_duplicate=on_duplicate)
+            return self._import_chunks(chunks, "book", self.repository.add_books, "import_books", "books",
+                                       self.repository.merge_books if merge else None)
+        chunks = DataHandler.stream_import_members(
+            filename, progress=progress, resume_file=self.storage.import_progress_file,
+            is_known_contact=self.repository.has_contact, on_duplicate=on_duplicate)
+        return self._import_chunks(chunks, "member", self.repository.add_members, "import_members", "members",
+                                   self.repository.merge_members if merge else None)
+
+    def _import_chunks(self, chunks, entity, add_items, op, label, merge_items=None):
+        """Assign IDs to and commit each imported chunk before the next one is read"""
+        summary = {"imported": 0, "updated": 0, "skipped": 0, "rejected": 0, "rejections": []}
+
+        try:
+            for items, rejections in chunks:
+                skipped = sum(r['reason'] == DataHandler.DUPLICATE_SKIPPED for r in rejections)
+                summary["skipped"] += skipped
+                rejections = [r for r in rejections if r['reason'] != DataHandler.DUPLICATE_SKIPPED]
+                summary["rejected"] += len(rejections)
+                summary["rejections"].extend(rejections[:10 - len(summary["rejections"])])
+
+                # With the 'update' policy, rows for existing items update them in place
+                updated = []
+                if merge_items and items:
+                    items, updated = merge_items(items)
+                if not items and not updated:
+                    continue
+
+                # Assign IDs from one reserved block and save
+                for item, item_id in zip(items, self.id_allocator.reserve(entity, len(items))):
+                    setattr(item, f"{entity}_id", item_id)
+
+                add_items(items)
+                # Journal replay upserts by ID, so new and updated items share one entry
+                self._commit(op, {label: [item.to_dict() for item in items + updated]})
+                summary["imported"] += len(items)
+                summary["updated"] += len(updated)
+        except (OSError, ValueError) as e:
+            raise DataFileError(f"Import stopped after {summary['imported']} {label} "
+                                f"were imported: {e}") from e
+
+        return summary
+
+    def export_csv(self, kind, filename, progress=None):
+        """Export books or members to a CSV file, returns the path written"""
+        if kind == "books":
+            export = DataHandler.export_books_to_csv
+        elif kind == "members":
+            export = DataHandler.export_members_to_csv
+        else:
+            raise ValidationError(f"Cannot export {kind}; use 'books' or 'members'.")
+        try:
+            export(self.books if kind == "books" else self.members, filename, progress=progress)
+        except OSError as e:
+            raise DataFileError(f"Failed to export {kind}: {e}") from e
+
+        # Files without a directory are written to the data directory
+        if os.path.dirname(filename) == '' and '~' not in filename:
+            return os.path.join(DataHandler.get_default_data_dir(), filename)
+        return filename
+
+    # Performance analysis
+    def analyze_sorting(self, kind, primary_key, secondary_keys=None, sizes=ANALYSIS_SIZES):
+        """
+        Time the sorting algorithms on generated data of the given sizes
+
+        Returns a dict with the results DataFrame, the time complexity of
+        each algorithm and the file the plot was saved to.
+        """
+        class_type = self._sample_class(kind)
+        self.performance_analyzer.compare_algorithms(
+            get_sorting_algorithms(),
+            list(sizes),
+            lambda size: DataHandler.get_sample_data(size, class_type),
+            primary_key,
+            secondary_keys
+        )
+        return {
+            "results": self.performance_analyzer.get_results_dataframe(),
+            "complexity": self.performance_analyzer.get_time_complexity_analysis(),
+            "visualization": self.performance_analyzer.visualize_results(),
+        }
+
+    def parallel_speedup(self, kind, primary_key, secondary_keys=None, size=200000):
+        """Speedup of the parallel merge sort by worker count, on generated data"""
+        data = DataHandler.get_sample_data(size, self._sample_class(kind))
+        return self.performance_analyzer.analyze_parallel_speedup(data, primary_key, secondary_keys)
+
+    def _sample_class(self, kind):
+        if kind == "books":
+            return Book
+        if kind == "members":
+            return Member
+        raise ValidationError(f"Cannot analyze {kind}; use 'books' or 'members'.")
@@ -1,46 +1,34 @@
-from book import Book
-from member import Member
-from transaction import Transaction
 from utils import (
-    validate_isbn, validate_name, validate_contact, validate_integer, 
-    validate_title, validate_author, get_valid_input, save_data, load_data
+    validate_isbn, validate_name, validate_contact, validate_integer,
+    validate_title, validate_author, get_valid_input
 )
-from sorting import get_sorting_algorithms, logical_and, logical_or, logical_implies
-from performance import PerformanceAnalyzer
+from sorting import logical_and
 from data_handler import DataHandler
+from library_service import LibraryService, LibraryError, DataFileError, StorageLockedError
 import os
+import sys
 import time
 
 class LibraryManagementSystem:
-    def __init__(self):
-        self.books_file = "books.json"
-        self.members_file = "members.json"
-        self.transactions_file = "transactions.json"
-        
-        # Load data from files
-        self.books = self._load_data(self.books_file, Book.from_dict)
-        self.members = self._load_data(self.members_file, Member.from_dict)
-        self.transactions = self._load_data(self.transactions_file, Transaction.from_dict)
-
-        # Initialize sorting algorithms and performance analyzer
-        self.sorting_algorithms = get_sorting_algorithms()
-        self.performance_analyzer = PerformanceAnalyzer()
+    """Interactive menu on top of LibraryService: prompts, calls the service and prints the outcome"""
     
-    # Simplified data loading and saving methods
-    def _load_data(self, filename, from_dict_func):
-        return [from_dict_func(item) for item in load_data(filename)]
+    # Number of items shown per page in listings and sort results
+    PAGE_SIZE = 20
     
-    def _save_data(self, items, filename):
-        save_data([item.to_dict() for item in items], filename)
+    def __init__(self, storage="json"):
+        self.service = LibraryService(storage)
     
-    def _save_books(self):
-        self._save_data(self.books, self.books_file)
+    @property
+    def books(self):
+        return self.service.books
     
-    def _save_members(self):
-        self._save_data(self.members, self.members_file)
+    @property
+    def members(self):
+        return self.service.members
     
-    def _save_transactions(self):
-        self._save_data(self.transactions, self.transactions_file)
+    @property
+    def transactions(self):
+        return self.service.transactions
     
     def add_book(self):
         print("\n--- Add New Book ---")
@@ -63,11 +51,8 @@ class LibraryManagementSystem:
             "Invalid ISBN format. Must be 10 or 13 digits."
         )
         
-        book_id = 1 if not self.books else max(book.book_id for book in self.books) + 1
-        self.books.append(Book(book_id, title, author, isbn))
-        self._save_books()
-        
-        print(f"Book '{title}' added successfully with ID {book_id}!")
+        book = self.service.add_book(title, author, isbn)
+        print(f"Book '{title}' added successfully with ID {book.book_id}!")
     
     def add_member(self):
         print("\n--- Add New Member ---")
@@ -84,11 +69,8 @@ class LibraryManagementSystem:
             "Invalid contact format. Enter a valid email or 10-digit phone number."
         )
         
-        member_id = 1 if not self.members else max(member.member_id for member in self.members) + 1
-        self.members.append(Member(member_id, name, contact))
-        self._save_members()
-        
-        print(f"Member '{name}' added successfully with ID {member_id}!")
+        member = self.service.add_member(name, contact)
+        print(f"Member '{name}' added successfully with ID {member.member_id}!")
     
     def list_items(self, items, header, empty_message):
         print(f"\n--- {header} ---")
@@ -96,10 +78,41 @@ class LibraryManagementSystem:
             print(empty_message)
             return False
         
-        for item in items:
-            print(item.display_info())
+        self._page_through(lambda offset, limit: items[offset:offset + limit], len(items))
         return True
     
+    def _write_items(self, items, separator=None):
+        """Render a page of items once and write it in a single call"""
+        lines = []
+        for item in items:
+            lines.append(item.display_info())
+            if separator:
+                lines.append(separator)
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+    
+    def _page_through(self, fetch_page, total, separator=None):
+        """Show items a page at a time; fetch_page(offset, limit) returns one page"""
+        offset = 0
+        while True:
+            self._write_items(fetch_page(offset, self.PAGE_SIZE), separator)
+            if total <= self.PAGE_SIZE:
+                return
+            
+            end = min(offset + self.PAGE_SIZE, total)
+            choice = get_valid_input(
+                f"Showing {offset + 1}-{end} of {total}. [n]ext, [p]revious, [q]uit: ",
+                lambda x: x.lower() in ['n', 'p', 'q'],
+                "Invalid choice."
+            ).lower()
+            
+            if choice == 'q':
+                return
+            if choice == 'n' and end < total:
+                offset += self.PAGE_SIZE
+            elif choice == 'p' and offset > 0:
+                offset -= self.PAGE_SIZE
+    
     def list_books(self):
         return self.list_items(self.books, "Book List", "No books in the library.")
     
@@ -114,36 +127,18 @@ class LibraryManagementSystem:
         
         book_id = int(get_valid_input(
             "Enter book ID to borrow: ",
-            lambda x: validate_integer(x) and any(book.book_id == int(x) for book in self.books),
+            lambda x: validate_integer(x) and self.service.repository.has_book(int(x)),
             "Invalid book ID."
         ))
         
         member_id = int(get_valid_input(
             "Enter member ID: ",
-            lambda x: validate_integer(x) and any(member.member_id == int(x) for member in self.members),
+            lambda x: validate_integer(x) and self.service.repository.has_member(int(x)),
             "Invalid member ID."
         ))
         
-        # Get objects and perform validation
-        book = next(book for book in self.books if book.book_id == book_id)
-        member = next(member for member in self.members if member.member_id == member_id)
-        
-        if not book.available:
-            print("This book is not available for borrowing.")
-            return
-        
-        # Create transaction and update records
-        transaction_id = 1 if not self.transactions else max(t.transaction_id for t in self.transactions) + 1
-        self.transactions.append(Transaction(transaction_id, book_id, member_id))
-        
-        book.update_availability(False)
-        member.borrow_book(book_id)
-        
-        # Save all updates
-        self._save_books()
-        self._save_members()
-        self._save_transactions()
-        
+        self.service.borrow_book(book_id, member_id)
+        book, member = self.service.get_book(book_id), self.service.get_member(member_id)
         print(f"Book '{book.title}' has been borrowed by {member.name} successfully!")
     
     def return_book(self):
@@ -155,20 +150,20 @@ class LibraryManagementSystem:
         
         member_id = int(get_valid_input(
             "Enter member ID: ",
-            lambda x: validate_integer(x) and any(member.member_id == int(x) for member in self.members),
+            lambda x: validate_integer(x) and self.service.repository.has_member(int(x)),
             "Invalid member ID."
         ))
         
-        member = next(member for member in self.members if member.member_id == member_id)
+        member = self.service.get_member(member_id)
+        borrowed = self.service.borrowed_books(member_id)
         
-        if not member.borrowed_books:
+        if not borrowed:
             print(f"{member.name} has no books to return.")
             return
         
         # Display borrowed books
         print(f"\nBooks borrowed by {member.name}:")
-        for book_id in member.borrowed_books:
-            book = next(book for book in self.books if book.book_id == book_id)
+        for book in borrowed:
             print(f"ID: {book.book_id}, Title: {book.title}")
         
         book_id = int(get_valid_input(
@@ -177,26 +172,35 @@ class LibraryManagementSystem:
             "Invalid book ID or not borrowed by this member."
         ))
         
-        # Process the return
-        book = next(book for book in self.books if book.book_id == book_id)
-        transaction = next((t for t in self.transactions 
-                         if t.book_id == book_id and t.member_id == member_id 
-                         and t.status == "borrowed"), None)
-        
-        if transaction:
-            transaction.complete_return()
+        self.service.return_book(book_id, member_id)
+        print(f"Book '{self.service.get_book(book_id).title}' has been returned by {member.name} successfully!")
+    
+    def search_books(self):
+        print("\n--- Search Books ---")
+        query = get_valid_input(
+            "Enter title or author words (prefixes and partial words work): ",
+            lambda x: bool(x.strip()),
+            "Please enter at least one word."
+        )
         
-        book.update_availability(True)
-        member.return_book(book_id)
+        start = time.perf_counter_ns()
+        results = self.service.search_books(query)
+        elapsed_ms = (time.perf_counter_ns() - start) / 1e6
         
-        self._save_books()
-        self._save_members()
-        self._save_transactions()
+        if not results:
+            print(f"No books match '{query}'.")
+            return
         
-        print(f"Book '{book.title}' has been returned by {member.name} successfully!")
+        print(f"Top {len(results)} matches ({elapsed_ms:.3f} ms):")
+        self._write_items([book for book, _ in results], "-----")
     
     def list_transactions(self):
-        self.list_items(self.transactions, "Transaction History", "No transactions recorded.")
+        print("\n--- Transaction History ---")
+        total = self.service.transaction_count()
+        if not total:
+            print("No transactions recorded.")
+            return
+        self._page_through(self.service.list_transactions, total)
     
     def sort_books(self):
         print("\n--- Sort Books ---")
@@ -231,17 +235,11 @@ class LibraryManagementSystem:
         
         secondary_keys = [(logical_and, 'available', 'available')] if use_secondary else None
         
-        # Select and execute sorting algorithm
-        sorting_algorithm, algo_name = self._select_sorting_algorithm()
-        sorted_books = self._perform_sort(self.books, sorting_algorithm, primary_key, secondary_keys, algo_name)
-        
-        # Display results
-        print(f"\nBooks sorted by {primary_key_options[choice][1]}" + 
-              (f" and availability (logical AND)" if use_secondary else ""))
-        
-        for book in sorted_books:
-            print(book.display_info())
-            print("-----")
+        self._sort_and_display(
+            "books", primary_key, secondary_keys,
+            f"\nBooks sorted by {primary_key_options[choice][1]}" +
+            (f" and availability (logical AND)" if use_secondary else "")
+        )
     
     def sort_members(self):
         print("\n--- Sort Members ---")
@@ -269,53 +267,58 @@ class LibraryManagementSystem:
         
         primary_key = primary_key_options[choice][0]
         
-        # Add calculated property if needed
-        if primary_key == 'borrowed_count':
-            for member in self.members:
-                member.borrowed_count = len(member.borrowed_books)
-        
-        # Select and execute sorting algorithm
-        sorting_algorithm, algo_name = self._select_sorting_algorithm()
-        sorted_members = self._perform_sort(self.members, sorting_algorithm, primary_key, None, algo_name)
+        self._sort_and_display(
+            "members", primary_key, None,
+            f"\nMembers sorted by {primary_key_options[choice][1]}"
+        )
+    
+    def _sort_and_display(self, kind, primary_key, secondary_keys, description):
+        """Sort fully with a chosen algorithm, or partially sort one page at a time"""
+        mode = get_valid_input(
+            "\nDisplay mode (1: Full sort, 2: Partial sort per page - fastest first page): ",
+            lambda x: x in ['1', '2'],
+            "Invalid choice."
+        )
         
-        # Display results
-        print(f"\nMembers sorted by {primary_key_options[choice][1]}")
+        if mode == '2':
+            def fetch_page(offset, limit):
+                start = time.perf_counter_ns()
+                page = self.service.sort_page(kind, primary_key, secondary_keys, offset, limit)
+                print(f"Partial sort (top {offset + limit}) - Execution time: {(time.perf_counter_ns() - start) / 1e9:.6f} seconds")
+                return page
+            
+            print(description)
+            total = len(self.books if kind == "books" else self.members)
+            self._page_through(fetch_page, total, "-----")
+            return
         
-        for member in sorted_members:
-            print(member.display_info())
-            print("-----")
+        # Select and execute sorting algorithm
+        result = self.service.sort(kind, primary_key, secondary_keys, self._select_sorting_algorithm())
+        print(f"Using {result['algorithm']} - Execution time: {result['execution_time']:.6f} seconds")
+        if result['selected_algorithm']:
+            profile = result['profile']
+            print(f"Auto selected: {result['selected_algorithm']} "
+                  f"(sampled descents: {profile['descent_ratio']:.1%}, inversions: {profile['inversion_ratio']:.1%})")
+        
+        sorted_items = result['items']
+        print(description)
+        self._page_through(lambda offset, limit: sorted_items[offset:offset + limit], len(sorted_items), "-----")
     
     def _select_sorting_algorithm(self):
-        """Helper method to select a sorting algorithm"""
+        """Helper method to select a sorting algorithm, returns its name"""
         print("\nSelect sorting algorithm:")
-        algo_options = list(self.sorting_algorithms.items())
+        algo_names = list(self.service.sorting_algorithms)
         
-        for i, (name, _) in enumerate(algo_options, 1):
+        for i, name in enumerate(algo_names, 1):
             print(f"{i}. {name}")
         
         algo_choice = int(get_valid_input(
-            f"Enter your choice (1-{len(algo_options)}): ",
-            lambda x: x.isdigit() and 1 <= int(x) <= len(algo_options),
+            f"Enter your choice (1-{len(algo_names)}): ",
+            lambda x: x.isdigit() and 1 <= int(x) <= len(algo_names),
             f"Invalid choice."
         ))
         
-        algo_name, algo_func = algo_options[algo_choice-1]
-        return algo_func, algo_name  # Return function first, then name
-    
-    def _perform_sort(self, items, sort_func, primary_key, secondary_keys, algo_name):
-        """Helper method to perform sorting and record performance"""
-        items_copy = items.copy()
-        
-        start_time = time.time()
-        sort_func(items_copy, primary_key, secondary_keys)
-        execution_time = time.time() - start_time
-        
-        self.performance_analyzer.analyze_algorithm(
-            sort_func, items, primary_key, secondary_keys, algo_name
-        )
-        
-        print(f"Using {algo_name} - Execution time: {execution_time:.6f} seconds")
-        return items_copy
+        return algo_names[algo_choice-1]
     
     def import_from_csv(self):
         print("\n--- Import Data from CSV ---")
@@ -332,52 +335,63 @@ class LibraryManagementSystem:
         print("\nFile Path: Enter filename or full path (use ~ for home directory)")
         filename = input("Enter CSV filename: ")
         
-        # Process the file
-        if '~' in filename:
-            filename = os.path.expanduser(filename)
-        
-        if not os.path.exists(filename):
+        if not os.path.exists(os.path.expanduser(filename)):
             print(f"\nError: File '{filename}' not found.")
             return
         
-        if data_type == 'books':
-            self._import_books(filename)
+        key = "ISBN" if data_type == 'books' else "contact"
+        policies = dict(enumerate(DataHandler.DUPLICATE_POLICIES, 1))
+        on_duplicate = policies[int(get_valid_input(
+            f"Rows whose {key} is already in the library or repeated in the file "
+            f"(1: Skip, 2: Update existing, 3: Reject): ",
+            lambda x: x in ['1', '2', '3'],
+            "Invalid choice."
+        ))]
+        
+        verify_isbn_checksum = data_type == 'books' and get_valid_input(
+            "Also reject ISBNs with a wrong check digit? (y/n): ",
+            lambda x: x.lower() in ['y', 'n'],
+            "Invalid choice."
+        ).lower() == 'y'
+        
+        try:
+            summary = self.service.import_csv(data_type, filename, on_duplicate, progress=self._print_progress,
+                                              verify_isbn_checksum=verify_isbn_checksum)
+        except DataFileError as e:
+            print(f"\nError importing {data_type}: {e}")
+            print("Chunks imported so far are saved; run the import again to resume.")
+            return
+        
+        print()
+        self._report_rejections(summary['rejections'], summary['rejected'])
+        if summary['skipped']:
+            print(f"Skipped {summary['skipped']} duplicate rows.")
+        if summary['updated']:
+            print(f"Updated {summary['updated']} existing {data_type}.")
+        if not summary['imported']:
+            if not summary['updated']:
+                print(f"No {data_type} were imported. Check CSV format.")
         else:
-            self._import_members(filename)
+            print(f"Successfully imported {summary['imported']} {data_type} from CSV.")
     
-    def _import_books(self, filename):
-        new_books = DataHandler.import_books_from_csv(filename)
-        if not new_books:
-            print("No books were imported. Check CSV format.")
-            return
-            
-        # Update IDs and save
-        max_id = max([book.book_id for book in self.books]) if self.books else 0
-        for i, book in enumerate(new_books):
-            book.book_id = max_id + i + 1
-        
-        self.books.extend(new_books)
-        self._save_books()
-        print(f"Successfully imported {len(new_books)} books from CSV.")
+    def _print_progress(self, rows_done, fraction=None):
+        percent = f" ({fraction:.0%})" if fraction is not None else ""
+        print(f"\r  {rows_done} rows processed{percent}", end="", flush=True)
     
-    def _import_members(self, filename):
-        new_members = DataHandler.import_members_from_csv(filename)
-        if not new_members:
-            print("No members were imported. Check CSV format.")
+    def _report_rejections(self, rejections, total=None):
+        """Print the rows skipped during an import"""
+        total = len(rejections) if total is None else total
+        if not total:
             return
-            
-        # Update IDs and save
-        max_id = max([member.member_id for member in self.members]) if self.members else 0
-        for i, member in enumerate(new_members):
-            member.member_id = max_id + i + 1
-        
-        self.members.extend(new_members)
-        self._save_members()
-        print(f"Successfully imported {len(new_members)} members from CSV.")
+        print(f"Skipped {total} invalid rows:")
+        for rejection in rejections:
+            print(f"  Line {rejection['line']}: {rejection['reason']}")
+        if total > len(rejections):
+            print(f"  ... and {total - len(rejections)} more")
     
     def export_to_csv(self):
         print("\n--- Export Data to CSV ---")
-        type_options = {'1': ('books', self.books), '2': ('members', self.members)}
+        type_options = {'1': 'books', '2': 'members'}
         
         choice = get_valid_input(
             "What to export? (1: Books, 2: Members): ",
@@ -385,43 +399,38 @@ class LibraryManagementSystem:
             "Invalid choice."
         )
         
-        data_type, data = type_options[choice]
+        data_type = type_options[choice]
         
         print("\nFile will be saved in the 'data' directory if no path specified.")
         filename = input("Enter output CSV filename: ")
         
-        # Export the data
-        export_func = getattr(DataHandler, f"export_{data_type}_to_csv")
-        if export_func(data, filename):
-            # Get full path for display
-            if os.path.dirname(filename) == '' and '~' not in filename:
-                full_path = os.path.join(DataHandler.get_default_data_dir(), filename)
-            else:
-                full_path = filename
-            print(f"Successfully exported {len(data)} {data_type} to {full_path}")
-        else:
-            print(f"Failed to export {data_type}.")
+        full_path = self.service.export_csv(data_type, filename, progress=self._print_progress)
+        count = len(self.books if data_type == 'books' else self.members)
+        print()
+        print(f"Successfully exported {count} {data_type} to {full_path}")
     
     def analyze_sorting_performance(self):
         print("\n--- Analyze Sorting Performance ---")
         
         # Define data options
         data_options = {
-            '1': (Book, 'title', 'Books'),
-            '2': (Member, 'name', 'Members')
+            '1': ('books', 'title', 'Books'),
+            '2': ('members', 'name', 'Members'),
+            '3': ('books', 'isbn', 'Books by ISBN'),
+            '4': ('members', 'borrowed_count', 'Members by borrowed count')
         }
         
         choice = get_valid_input(
-            "Select data type (1: Books, 2: Members): ",
+            "Select data type (1: Books, 2: Members, 3: Books by ISBN, 4: Members by borrowed count): ",
             lambda x: x in data_options,
             "Invalid choice."
         )
         
-        class_type, primary_key, label = data_options[choice]
+        kind, primary_key, label = data_options[choice]
         
         # Configure secondary sorting for books
         secondary_keys = None
-        if class_type == Book:
+        if kind == 'books':
             if get_valid_input(
                 "Include secondary sorting? (y/n): ",
                 lambda x: x.lower() in ['y', 'n'],
@@ -431,24 +440,27 @@ class LibraryManagementSystem:
         
         # Run the performance analysis
         print(f"\nAnalyzing performance for {label} sorting...")
-        self.performance_analyzer.compare_algorithms(
-            self.sorting_algorithms,
-            [10, 100, 500, 1000],  # Data sizes to test
-            lambda size: DataHandler.get_sample_data(size, class_type),
-            primary_key,
-            secondary_keys
-        )
+        analysis = self.service.analyze_sorting(kind, primary_key, secondary_keys)
         
         # Display results
         print("\nResults:")
-        print(self.performance_analyzer.get_results_dataframe())
+        print(analysis['results'])
         
         print("\nTime Complexity Analysis:")
-        for algo, complexity in self.performance_analyzer.get_time_complexity_analysis().items():
+        for algo, complexity in analysis['complexity'].items():
             print(f"- {algo}: {complexity}")
         
-        viz_file = self.performance_analyzer.visualize_results()
-        print(f"\nPerformance visualization saved as {viz_file}")
+        print(f"\nPerformance visualization saved as {analysis['visualization']}")
+        
+        if get_valid_input(
+            "\nMeasure parallel merge sort speedup on 200,000 items? (y/n): ",
+            lambda x: x.lower() in ['y', 'n'],
+            "Invalid choice."
+        ).lower() == 'y':
+            speedups = self.service.parallel_speedup(kind, primary_key, secondary_keys)
+            print("\nParallel speedup by worker count:")
+            for workers, speedup in speedups.items():
+                print(f"- {workers} workers: {speedup:.2f}x")
     
     def run(self):
         menu_options = [
@@ -456,6 +468,7 @@ class LibraryManagementSystem:
             ('Add a Member', self.add_member),
             ('List all Books', self.list_books),
             ('List all Members', self.list_members),
+            ('Search Books', self.search_books),
             ('Borrow a Book', self.borrow_book),
             ('Return a Book', self.return_book),
             ('List all Transactions', self.list_transactions),
@@ -482,13 +495,19 @@ class LibraryManagementSystem:
             
             choice_idx = int(choice) - 1
             if choice_idx == len(menu_options) - 1:  # Exit option
+                self.service.close()
                 print("\nThank you for using the Library Management System. Goodbye!")
                 break
             
-            menu_options[choice_idx][1]()
+            try:
+                menu_options[choice_idx][1]()
+            except LibraryError as e:
+                print(f"\nError: {e}")
             input("\nPress Enter to continue...")
 
 if __name__ == "__main__":
-    library = LibraryManagementSystem()
+    try:
+        library = LibraryManagementSystem(os.environ.get("LIBRARY_STORAGE", "json"))
+    except StorageLockedError as e:
+        sys.exit(f"Error: {e}")
     library.run()
-
@@ -1,4 +1,6 @@
 class Member:
+    __slots__ = ("member_id", "name", "contact", "borrowed_books")
+    
     def __init__(self, member_id, name, contact, borrowed_books=None):
         self.member_id = member_id
         
@@ -10,6 +12,10 @@ class Member:
         self.contact = contact
         self.borrowed_books = borrowed_books if borrowed_books else []
     
+    @property
+    def borrowed_count(self):
+        return len(self.borrowed_books)
+    
     def display_info(self):
         return f" ID: {self.member_id}\n Name: {self.name}\n Contact: {self.contact}\n Books Borrowed: {len(self.borrowed_books)}"
     
@@ -1,18 +1,132 @@
+import gc
+import math
+import os
+import statistics
 import time
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-from sorting import insertion_sort, merge_sort
+from functools import partial
+from sorting import insertion_sort, merge_sort, parallel_merge_sort
+
+# pandas and matplotlib are imported where they are used so the CLI starts
+# without paying for them unless performance analysis is actually run
+
+# Two-sided 95% Student's t critical values by degrees of freedom (1-30);
+# larger samples use the normal approximation
+_T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+def summarize_samples(samples):
+    """
+    Summary statistics for a list of timings in seconds
+    
+    Returns min, median, p95 (nearest rank), sample standard deviation and
+    the 95% confidence interval of the mean.
+    """
+    ordered = sorted(samples)
+    count = len(ordered)
+    mean = statistics.fmean(ordered)
+    stddev = statistics.stdev(ordered) if count > 1 else 0.0
+    
+    if count > 1:
+        t_value = _T_95[count - 2] if count - 1 <= len(_T_95) else 1.96
+        margin = t_value * stddev / math.sqrt(count)
+    else:
+        margin = 0.0
+    
+    return {
+        "min_time": ordered[0],
+        "median_time": statistics.median(ordered),
+        "p95_time": ordered[max(0, math.ceil(0.95 * count) - 1)],
+        "stddev": stddev,
+        "ci_low": mean - margin,
+        "ci_high": mean + margin,
+        "samples": count
+    }
 
 class PerformanceAnalyzer:
-    def __init__(self):
+    def __init__(self, warmup=1, repeat=5, disable_gc=True):
+        """
+        Args:
+            warmup: untimed runs before measuring
+            repeat: timed runs per measurement
+            disable_gc: keep the garbage collector off during timed runs
+        """
+        self.warmup = warmup
+        self.repeat = repeat
+        self.disable_gc = disable_gc
         self.results = {
             "algorithm": [],
             "data_size": [],
             "execution_time": [],
-            "has_secondary_sort": []
+            "has_secondary_sort": [],
+            "selected_algorithm": [],
+            "min_time": [],
+            "median_time": [],
+            "p95_time": [],
+            "stddev": [],
+            "ci_low": [],
+            "ci_high": [],
+            "samples": []
         }
     
+    def benchmark(self, run, setup=None, warmup=None, repeat=None):
+        """
+        Time a callable over several runs with time.perf_counter_ns
+        
+        Args:
+            run: function to time, called with the result of setup() if given
+            setup: untimed function preparing a fresh argument for each run
+            warmup: untimed runs first (default: self.warmup)
+            repeat: timed runs (default: self.repeat)
+        
+        Returns:
+            list of run times in seconds
+        """
+        warmup = self.warmup if warmup is None else warmup
+        repeat = self.repeat if repeat is None else repeat
+        
+        for _ in range(warmup):
+            run(setup()) if setup else run()
+        
+        gc_was_enabled = gc.isenabled()
+        samples = []
+        try:
+            for _ in range(repeat):
+                argument = setup() if setup else None
+                gc.collect()
+                if self.disable_gc:
+                    gc.disable()
+                start = time.perf_counter_ns()
+                run(argument) if setup else run()
+                elapsed = time.perf_counter_ns() - start
+                if gc_was_enabled:
+                    gc.enable()
+                samples.append(elapsed / 1e9)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return samples
+    
+    def record_run(self, name, data_size, secondary_keys, samples, selected_algorithm=None):
+        """
+        Add a measurement to the results, returns its summary statistics
+        
+        samples is a list of run times in seconds, or a single time for a
+        run that was timed elsewhere (such as a sort done from the menu).
+        """
+        if not isinstance(samples, (list, tuple)):
+            samples = [samples]
+        summary = summarize_samples(samples)
+        
+        self.results["algorithm"].append(name)
+        self.results["data_size"].append(data_size)
+        self.results["execution_time"].append(summary["median_time"])
+        self.results["has_secondary_sort"].append(secondary_keys is not None)
+        self.results["selected_algorithm"].append(selected_algorithm)
+        for column, value in summary.items():
+            self.results[column].append(value)
+        return summary
+    
     def analyze_algorithm(self, algorithm, items, primary_key, secondary_keys=None, name=None):
         """
         Analyze performance of a sorting algorithm
@@ -23,23 +137,21 @@ class PerformanceAnalyzer:
             primary_key: attribute for primary sorting
             secondary_keys: list of tuples for secondary sorting
             name: name of the algorithm (optional)
+        
+        Returns:
+            median execution time in seconds
         """
-        # Make a copy to avoid modifying the original list
-        items_copy = items.copy()
-        
-        # Run the algorithm and measure time
-        start_time = time.time()
-        algorithm(items_copy, primary_key, secondary_keys)
-        execution_time = time.time() - start_time
-        
-        # Store results
-        algo_name = name if name else algorithm.__name__
-        self.results["algorithm"].append(algo_name)
-        self.results["data_size"].append(len(items))
-        self.results["execution_time"].append(execution_time)
-        self.results["has_secondary_sort"].append(secondary_keys is not None)
+        # Every run sorts a fresh copy; copying is not timed
+        samples = self.benchmark(
+            lambda items_copy: algorithm(items_copy, primary_key, secondary_keys),
+            setup=items.copy
+        )
         
-        return execution_time
+        algo_name = name if name else getattr(algorithm, "__name__", str(algorithm))
+        # Adaptive sorts report which algorithm they dispatched to
+        summary = self.record_run(algo_name, len(items), secondary_keys, samples,
+                                  getattr(algorithm, "last_choice", None))
+        return summary["median_time"]
     
     def compare_algorithms(self, algorithms, data_sizes, generate_data_func, primary_key, secondary_keys=None):
         """
@@ -65,14 +177,49 @@ class PerformanceAnalyzer:
                 if secondary_keys:
                     self.analyze_algorithm(func, data, primary_key, secondary_keys, f"{name} (With Secondary)")
     
+    def analyze_parallel_speedup(self, items, primary_key, secondary_keys=None, worker_counts=None):
+        """
+        Measure parallel merge sort speedup against the number of worker processes
+        
+        Args:
+            items: data to sort
+            primary_key: attribute for primary sorting
+            secondary_keys: list of tuples for secondary sorting
+            worker_counts: worker counts to test (default: 1, 2, 4, ... up to the CPU count)
+        
+        Returns:
+            dict of {workers: speedup relative to one worker}
+        """
+        if not worker_counts:
+            cpu_count = os.cpu_count() or 1
+            worker_counts = [1]
+            while worker_counts[-1] * 2 <= cpu_count:
+                worker_counts.append(worker_counts[-1] * 2)
+            if worker_counts[-1] != cpu_count:
+                worker_counts.append(cpu_count)
+        
+        timings = {}
+        for workers in worker_counts:
+            timings[workers] = self.analyze_algorithm(
+                partial(parallel_merge_sort, workers=workers), items, primary_key, secondary_keys,
+                f"Parallel Merge Sort ({workers} workers)"
+            )
+        
+        baseline = timings[worker_counts[0]]
+        return {workers: baseline / elapsed for workers, elapsed in timings.items()}
+    
     def visualize_results(self):
         """Create visualizations of the performance data"""
         if not self.results["algorithm"]:
             print("No performance data to visualize")
             return
         
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        
         # Convert results to DataFrame
-        results_df = pd.DataFrame(self.results)
+        results_df = self.get_results_dataframe()
         
         # Group by algorithm and data size
         grouped = results_df.groupby(["algorithm", "data_size", "has_secondary_sort"])["execution_time"].mean().reset_index()
@@ -109,6 +256,7 @@ class PerformanceAnalyzer:
 
     def get_results_dataframe(self):
         """Return performance results as a pandas DataFrame"""
+        import pandas as pd
         return pd.DataFrame(self.results)
     
     def get_time_complexity_analysis(self):
@@ -117,7 +265,19 @@ class PerformanceAnalyzer:
             "Insertion Sort (Loop-based)": "O(n²) - Quadratic time complexity",
             "Insertion Sort (Loop-based) (With Secondary)": "O(n²) - With additional constant factor for logical operations",
             "Merge Sort (Recursive)": "O(n log n) - Linearithmic time complexity",
-            "Merge Sort (Recursive) (With Secondary)": "O(n log n) - With additional constant factor for logical operations"
+            "Merge Sort (Recursive) (With Secondary)": "O(n log n) - With additional constant factor for logical operations",
+            "Merge Sort (Bottom-up)": "O(n log n) - Linearithmic, iterative with a single buffer",
+            "Merge Sort (Bottom-up) (With Secondary)": "O(n log n) - With additional constant factor for logical operations",
+            "Parallel Merge Sort": "O(n log n) - Run sorts divided across worker processes, heap k-way merge",
+            "Parallel Merge Sort (With Secondary)": "O(n log n) - Secondary keys are precomputed once per item",
+            "Radix Sort (LSD)": "O(d·n) - d stable counting passes over integer or digit-string keys, merge sort otherwise",
+            "Radix Sort (LSD) (With Secondary)": "O(d·n) - Secondary flags are one extra counting pass",
+            "Timsort (Built-in)": "O(n log n) - Linearithmic, O(n) on presorted runs",
+            "Timsort (Built-in) (With Secondary)": "O(n log n) - Secondary keys are precomputed once per item",
+            "NumPy Sort (Vectorized)": "O(n log n) - Stable lexsort over extracted key columns, comparisons in C",
+            "NumPy Sort (Vectorized) (With Secondary)": "O(n log n) - Logical expressions evaluated as whole-column boolean ops",
+            "Auto (Adaptive)": "O(n log n), O(n) on sorted runs - Timsort, after sampling how presorted the input is",
+            "Auto (Adaptive) (With Secondary)": "O(n log n) - Timsort on the composite keys, after sampling them"
         }
         
         return complexity
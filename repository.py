@@ -0,0 +1,206 @@
+from sorted_index import SortedIndex
+from utils import normalize_isbn, normalize_contact
+
+
+class LibraryRepository:
+    """
+    In-memory store for books, members and transactions.
+
+    Keeps dictionary indexes next to the lists so lookups by ID, ISBN or
+    contact are O(1) instead of a scan over the whole collection. ISBNs and
+    contacts are indexed in normalized form (see utils.normalize_isbn and
+    normalize_contact), so differently written duplicates are found too. Sorted indexes on the
+    sortable attributes are built on first use and then kept up to date, and
+    an optional SearchIndex is updated as books are added.
+    """
+
+    BOOK_SORT_KEYS = ("book_id", "title", "author", "isbn")
+    MEMBER_SORT_KEYS = ("member_id", "name", "contact", "borrowed_count")
+
+    def __init__(self, books=None, members=None, transactions=None, search_index=None):
+        self.books = []
+        self.members = []
+        self.transactions = []
+
+        self._books_by_id = {}
+        self._books_by_isbn = {}
+        self._members_by_id = {}
+        self._members_by_contact = {}
+        self._transactions_by_id = {}
+        self._open_loans = {}
+        self._loans_by_book = {}
+        self._loans_by_member = {}
+        self._book_indexes = {}
+        self._member_indexes = {}
+        self.search_index = None
+
+        self.add_books(books or [])
+        self.add_members(members or [])
+        for transaction in transactions or []:
+            self.add_transaction(transaction)
+
+        # A saved index only needs the books added or removed since it was written
+        if search_index is not None:
+            search_index.sync(self.books)
+            self.search_index = search_index
+
+    # Books
+    def add_book(self, book):
+        self.books.append(book)
+        self._books_by_id[book.book_id] = book
+        self._books_by_isbn.setdefault(normalize_isbn(book.isbn) or book.isbn, []).append(book)
+        for index in self._book_indexes.values():
+            index.insert(book)
+        if self.search_index is not None:
+            self.search_index.add(book)
+        return book
+
+    def add_books(self, books):
+        for book in books:
+            self.add_book(book)
+
+    def get_book(self, book_id):
+        return self._books_by_id.get(book_id)
+
+    def has_book(self, book_id):
+        return book_id in self._books_by_id
+
+    def find_books_by_isbn(self, isbn):
+        return list(self._books_by_isbn.get(normalize_isbn(isbn) or isbn, []))
+
+    def has_isbn(self, isbn):
+        return (normalize_isbn(isbn) or isbn) in self._books_by_isbn
+
+    def update_book(self, book, title, author):
+        """Change a book's title and author, keeping the sorted and search indexes in step"""
+        if self.search_index is not None:
+            self.search_index.remove(book.book_id, f"{book.title} {book.author}")
+        book.title = title
+        book.author = author
+        for index in self._book_indexes.values():
+            index.update(book)
+        if self.search_index is not None:
+            self.search_index.add(book)
+        return book
+
+    def merge_books(self, books):
+        """
+        Split imported books into new ones and updates of books with the same ISBN
+        
+        Existing books take the imported title and author and keep their ID
+        and availability. Returns (new_books, updated_books).
+        """
+        new_books, updated = [], []
+        for book in books:
+            existing = self._books_by_isbn.get(normalize_isbn(book.isbn) or book.isbn)
+            if existing:
+                updated.append(self.update_book(existing[0], book.title, book.author))
+            else:
+                new_books.append(book)
+        return new_books, updated
+
+    def search_books(self, query, limit=10):
+        """Ranked title/author search, returns (book, score) pairs"""
+        if self.search_index is None:
+            raise ValueError("No search index is attached to this repository")
+        return [(self._books_by_id[book_id], score)
+                for book_id, score in self.search_index.search(query, limit)]
+
+    # Members
+    def add_member(self, member):
+        self.members.append(member)
+        self._members_by_id[member.member_id] = member
+        self._members_by_contact[normalize_contact(member.contact)] = member
+        for index in self._member_indexes.values():
+            index.insert(member)
+        return member
+
+    def add_members(self, members):
+        for member in members:
+            self.add_member(member)
+
+    def get_member(self, member_id):
+        return self._members_by_id.get(member_id)
+
+    def has_member(self, member_id):
+        return member_id in self._members_by_id
+
+    def find_member_by_contact(self, contact):
+        return self._members_by_contact.get(normalize_contact(contact))
+
+    def has_contact(self, contact):
+        return normalize_contact(contact) in self._members_by_contact
+
+    def merge_members(self, members):
+        """
+        Split imported members into new ones and updates of members with the same contact
+        
+        Existing members take the imported name and contact and keep their ID
+        and borrowed books. Returns (new_members, updated_members).
+        """
+        new_members, updated = [], []
+        for member in members:
+            existing = self._members_by_contact.get(normalize_contact(member.contact))
+            if existing:
+                existing.name = member.name
+                existing.contact = member.contact
+                self.refresh_member(existing)
+                updated.append(existing)
+            else:
+                new_members.append(member)
+        return new_members, updated
+
+    def refresh_member(self, member):
+        """Reposition a member in the sorted indexes after its details or borrowed books changed"""
+        for index in self._member_indexes.values():
+            index.update(member)
+
+    # Sorted views
+    def sorted_books(self, primary_key, secondary_keys=None, limit=None):
+        """Books ordered by a sortable attribute, read from the maintained index"""
+        if primary_key not in self.BOOK_SORT_KEYS:
+            raise ValueError(f"Books have no sorted index on {primary_key}")
+        return self._sorted_index(self._book_indexes, self.books, "book_id", primary_key) \
+            .walk(secondary_keys, limit)
+
+    def sorted_members(self, primary_key, secondary_keys=None, limit=None):
+        """Members ordered by a sortable attribute, read from the maintained index"""
+        if primary_key not in self.MEMBER_SORT_KEYS:
+            raise ValueError(f"Members have no sorted index on {primary_key}")
+        return self._sorted_index(self._member_indexes, self.members, "member_id", primary_key) \
+            .walk(secondary_keys, limit)
+
+    def _sorted_index(self, indexes, items, id_attribute, primary_key):
+        if primary_key not in indexes:
+            indexes[primary_key] = SortedIndex(primary_key, id_attribute, items)
+        return indexes[primary_key]
+
+    # Transactions
+    def add_transaction(self, transaction):
+        self.transactions.append(transaction)
+        self._transactions_by_id[transaction.transaction_id] = transaction
+        self._loans_by_book.setdefault(transaction.book_id, []).append(transaction)
+        self._loans_by_member.setdefault(transaction.member_id, []).append(transaction)
+        if transaction.status == "borrowed":
+            self._open_loans[(transaction.book_id, transaction.member_id)] = transaction
+        return transaction
+
+    def get_transaction(self, transaction_id):
+        return self._transactions_by_id.get(transaction_id)
+
+    # Loans
+    def get_open_loan(self, book_id, member_id):
+        """Return the active borrow transaction for this book and member, if any"""
+        return self._open_loans.get((book_id, member_id))
+
+    def close_loan(self, transaction):
+        """Mark a loan as returned and remove it from the open-loan index"""
+        transaction.complete_return()
+        self._open_loans.pop((transaction.book_id, transaction.member_id), None)
+        return transaction
+
+    def loans_for_book(self, book_id):
+        return list(self._loans_by_book.get(book_id, []))
+
+    def loans_for_member(self, member_id):
+        return list(self._loans_by_member.get(member_id, []))
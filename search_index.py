@@ -0,0 +1,274 @@
+import math
+import re
+import zlib
+from bisect import bisect_left, insort
+
+from utils import save_data, load_data
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Dropped from queries that also contain other words
+STOP_WORDS = frozenset(("a", "an", "and", "the", "of", "in", "on", "to", "for"))
+
+# Field weights: a word in the title counts more than one in the author
+TITLE_WEIGHT = 2.0
+AUTHOR_WEIGHT = 1.0
+
+# Match quality by kind of match, multiplied into the score
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.6
+NGRAM_MATCH = 0.4
+
+# Most vocabulary words a single prefix or n-gram term expands to
+MAX_EXPANSIONS = 50
+# Trigram overlap (Jaccard) a word needs to count as a fuzzy match
+MIN_NGRAM_SIMILARITY = 0.25
+
+
+def tokenize(text):
+    """Lower-case words of a title, author or query"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def fingerprint(book):
+    """Checksum of the indexed fields, to notice title or author changes made elsewhere"""
+    return zlib.crc32(f"{book.title}\0{book.author}".encode())
+
+
+def trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Inverted index over book titles and authors.
+
+    Each word maps to the books containing it with a field weight, so a
+    query only touches the postings of its own words. Query words match
+    exactly, as a prefix of an indexed word ('tolk' finds 'tolkien'), or
+    by shared trigrams for misspellings and fragments. Results are ranked
+    by match quality, field weight and how rare the word is (idf).
+    """
+
+    def __init__(self, filename="search_index.json"):
+        self.filename = filename
+        self._postings = {}     # word -> {book_id: weight}
+        self._fingerprints = {}  # book_id -> fingerprint of the indexed title and author
+        self._trigrams = {}     # trigram -> words containing it
+        self._vocabulary = None  # sorted words, built on first prefix search
+        self.dirty = False
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def add(self, book):
+        """Index a book's title and author, replacing any earlier entry for it"""
+        if book.book_id in self._fingerprints:
+            self.remove(book.book_id)
+
+        weights = {}
+        for token in tokenize(book.title):
+            weights[token] = weights.get(token, 0.0) + TITLE_WEIGHT
+        for token in tokenize(book.author):
+            weights[token] = weights.get(token, 0.0) + AUTHOR_WEIGHT
+        self._index_document(book.book_id, weights)
+        self._fingerprints[book.book_id] = fingerprint(book)
+        self.dirty = True
+
+    def remove(self, book_id, text=None):
+        """
+        Drop a book from the index
+
+        Pass the book's indexed title and author as text to only touch
+        those words' postings; otherwise the whole vocabulary is scanned.
+        """
+        if book_id not in self._fingerprints:
+            return
+        del self._fingerprints[book_id]
+        tokens = set(tokenize(text)) if text is not None else list(self._postings)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is not None and postings.pop(book_id, None) is not None and not postings:
+                self._drop_token(token)
+        self.dirty = True
+
+    def sync(self, books):
+        """
+        Bring a loaded index in line with the catalog
+
+        Books that are new or whose title or author no longer match the
+        indexed fingerprint are (re-)indexed, and books no longer in the
+        catalog are dropped.
+        """
+        current = set()
+        changed = []
+        for book in books:
+            current.add(book.book_id)
+            if self._fingerprints.get(book.book_id) != fingerprint(book):
+                changed.append(book)
+        stale = {book.book_id for book in changed if book.book_id in self._fingerprints}
+        stale.update(book_id for book_id in self._fingerprints if book_id not in current)
+        if stale:
+            self._remove_all(stale)
+        for book in changed:
+            self.add(book)
+
+    def _remove_all(self, book_ids):
+        """Drop several books whose indexed text is unknown in a single pass over the vocabulary"""
+        for book_id in book_ids:
+            del self._fingerprints[book_id]
+        for token, postings in list(self._postings.items()):
+            for book_id in book_ids.intersection(postings):
+                del postings[book_id]
+            if not postings:
+                self._drop_token(token)
+        self.dirty = True
+
+    def search(self, query, limit=10):
+        """
+        Return up to limit (book_id, score) pairs, best match first
+
+        Books matching every query word come first, then books matching
+        fewer of them; within each group the scores decide. Each word adds
+        the score of its best match in the book.
+        """
+        terms = tokenize(query)
+        selective = [term for term in terms if term not in STOP_WORDS]
+        terms = list(dict.fromkeys(selective or terms))
+
+        document_count = max(1, len(self._fingerprints))
+        matches = []
+        for term in terms:
+            expanded = []
+            for token, quality in self._expand(term):
+                postings = self._postings[token]
+                idf = math.log(1 + document_count / len(postings))
+                expanded.append((postings, quality * idf))
+            if expanded:
+                matches.append(expanded)
+        if not matches:
+            return []
+
+        # Rarest word first: only books containing it can match every word
+        matches.sort(key=lambda expanded: sum(len(postings) for postings, _ in expanded))
+        candidates = self._score_term(matches[0], None)
+        for expanded in matches[1:]:
+            term_scores = self._score_term(expanded, candidates)
+            candidates = {book_id: score + term_scores[book_id]
+                          for book_id, score in candidates.items() if book_id in term_scores}
+            if not candidates:
+                break
+
+        ranked = sorted(candidates.items(), key=lambda entry: (-entry[1], entry[0]))[:limit]
+        if len(ranked) < limit and len(matches) > 1:
+            # Not enough books match every word: fill up with partial matches
+            found = {book_id for book_id, _ in ranked}
+            scores = {}
+            for expanded in matches:
+                for book_id, score in self._score_term(expanded, None).items():
+                    if book_id not in found:
+                        scores[book_id] = scores.get(book_id, 0.0) + score
+            partial = sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+            ranked.extend(partial[:limit - len(ranked)])
+        return ranked
+
+    def _score_term(self, expanded, restrict_to):
+        """Best score per book for one query word, optionally only for the given books"""
+        scores = {}
+        for postings, token_score in expanded:
+            if restrict_to is not None and len(restrict_to) < len(postings):
+                entries = ((book_id, postings[book_id]) for book_id in restrict_to if book_id in postings)
+            else:
+                entries = postings.items()
+            for book_id, weight in entries:
+                score = token_score * weight
+                if score > scores.get(book_id, 0.0):
+                    scores[book_id] = score
+        return scores
+
+    def _expand(self, term):
+        """Indexed words matching a query word, with their match quality"""
+        matches = {}
+        if term in self._postings:
+            matches[term] = EXACT_MATCH
+
+        vocabulary = self._sorted_vocabulary()
+        position = bisect_left(vocabulary, term)
+        expansions = 0
+        while position < len(vocabulary) and expansions < MAX_EXPANSIONS:
+            token = vocabulary[position]
+            if not token.startswith(term):
+                break
+            if token != term:
+                matches[token] = PREFIX_MATCH
+                expansions += 1
+            position += 1
+
+        if len(term) >= 3:
+            term_grams = trigrams(term)
+            shared = {}
+            for gram in term_grams:
+                for token in self._trigrams.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            candidates = sorted(shared.items(), key=lambda entry: -entry[1])[:MAX_EXPANSIONS]
+            for token, count in candidates:
+                similarity = count / (len(term_grams) + len(trigrams(token)) - count)
+                if similarity >= MIN_NGRAM_SIMILARITY and token not in matches:
+                    matches[token] = NGRAM_MATCH * similarity
+
+        return matches.items()
+
+    def _index_document(self, book_id, weights):
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                for gram in trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+                if self._vocabulary is not None:
+                    insort(self._vocabulary, token)
+            postings[book_id] = weight
+
+    def _drop_token(self, token):
+        del self._postings[token]
+        for gram in trigrams(token):
+            tokens = self._trigrams.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[gram]
+        if self._vocabulary is not None:
+            self._vocabulary.pop(bisect_left(self._vocabulary, token))
+
+    def _sorted_vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        return self._vocabulary
+
+    # Persistence
+    def save(self):
+        """Write the postings to filename, so the next start does not re-tokenize the catalog"""
+        postings = {
+            token: [list(entries), list(entries.values())]
+            for token, entries in self._postings.items()
+        }
+        # Books without indexable words have no postings but still count as indexed
+        save_data({"book_ids": list(self._fingerprints), "fingerprints": list(self._fingerprints.values()),
+                   "postings": postings}, self.filename, indent=None)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, filename="search_index.json"):
+        """Read a saved index, or start an empty one if there is none"""
+        index = cls(filename)
+        data = load_data(filename)
+        if not data:
+            return index
+
+        index._fingerprints = dict(zip(data["book_ids"], data["fingerprints"]))
+        for token, (book_ids, weights) in data["postings"].items():
+            index._postings[token] = dict(zip(book_ids, weights))
+            for gram in trigrams(token):
+                index._trigrams.setdefault(gram, set()).add(token)
+        return index
@@ -0,0 +1,75 @@
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+from sorting import secondary_sort_key
+
+
+class SortedIndex:
+    """
+    A collection kept ordered by one attribute, updated incrementally.
+
+    Entries are ordered by (attribute value, item ID) and maintained with
+    bisect, so an insert or update costs a binary search plus a list shift
+    instead of a full re-sort, and reading the sorted order is a plain walk.
+    """
+
+    def __init__(self, key_attribute, id_attribute, items=()):
+        self.key_attribute = key_attribute
+        self._get_key = attrgetter(key_attribute)
+        self._get_id = attrgetter(id_attribute)
+
+        # Built with one sort; every change afterwards is incremental
+        items = list(items)
+        pairs = sorted(((self._get_key(item), self._get_id(item)), index)
+                       for index, item in enumerate(items))
+        self._entries = [entry for entry, _ in pairs]
+        self._items = [items[index] for _, index in pairs]
+        self._entry_by_id = {entry[1]: entry for entry in self._entries}
+
+    def __len__(self):
+        return len(self._items)
+
+    def insert(self, item):
+        entry = (self._get_key(item), self._get_id(item))
+        position = bisect_right(self._entries, entry)
+        self._entries.insert(position, entry)
+        self._items.insert(position, item)
+        self._entry_by_id[entry[1]] = entry
+
+    def remove(self, item):
+        entry = self._entry_by_id.pop(self._get_id(item))
+        position = bisect_left(self._entries, entry)
+        del self._entries[position]
+        del self._items[position]
+
+    def update(self, item):
+        """Move an item whose key attribute may have changed"""
+        if self._entry_by_id[self._get_id(item)][0] != self._get_key(item):
+            self.remove(item)
+            self.insert(item)
+
+    def walk(self, secondary_keys=None, limit=None):
+        """
+        Return items in key order, optionally only the first limit of them
+
+        With secondary keys, each run of equal primary values is reordered
+        by the secondary flags, as the sorting algorithms would do.
+        """
+        if not secondary_keys:
+            return self._items[:limit]
+
+        flags = secondary_sort_key(secondary_keys)
+        entries = self._entries
+        count = len(entries)
+        result = []
+        start = 0
+        while start < count and (limit is None or len(result) < limit):
+            end = start + 1
+            while end < count and entries[end][0] == entries[start][0]:
+                end += 1
+            group = self._items[start:end]
+            if end - start > 1:
+                group.sort(key=flags)
+            result.extend(group)
+            start = end
+        return result[:limit]
@@ -0,0 +1,433 @@
+import json
+import os
+import sqlite3
+
+from book import Book
+from member import Member
+from transaction import Transaction
+from sorting import logical_and, logical_or, logical_implies
+from utils import save_data, load_data
+
+
+class JsonStorage:
+    """
+    JSON snapshot storage with an append-only journal.
+
+    Every mutation is appended to the journal as a single JSON line, so the
+    cost of a write does not depend on the size of the catalog. The JSON
+    files are only rewritten when the journal is compacted into a snapshot,
+    once it has grown to compact_ratio times the snapshot's size: rewriting
+    a larger catalog then happens proportionally less often, so the
+    amortized cost per write stays constant.
+    """
+
+    supports_queries = False
+
+    def __init__(self, books_file="books.json", members_file="members.json",
+                 transactions_file="transactions.json", journal_file="library_journal.jsonl",
+                 compact_ratio=0.5, min_compact_bytes=1024 * 1024, durable=True):
+        self.books_file = books_file
+        self.members_file = members_file
+        self.transactions_file = transactions_file
+        self.journal_file = journal_file
+        # The saved search index and the lock belong to this data, so they live next to books.json
+        self.search_index_file = os.path.join(os.path.dirname(books_file), "search_index.json")
+        self.lock_file = os.path.join(os.path.dirname(books_file), "library.lock")
+        self.import_progress_file = os.path.join(os.path.dirname(books_file), "import_progress.json")
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self.durable = durable
+        self.pending_entries = 0
+        self.journal_bytes = 0
+        self.snapshot_bytes = 0
+        self._journal = None
+
+    def load(self):
+        """Load the latest snapshot and replay the journal on top of it"""
+        books = [Book.from_dict(item) for item in load_data(self.books_file)]
+        members = [Member.from_dict(item) for item in load_data(self.members_file)]
+        transactions = [Transaction.from_dict(item) for item in load_data(self.transactions_file)]
+
+        self.pending_entries = self._replay(books, members, transactions)
+        self.snapshot_bytes = self._snapshot_size()
+        self.journal_bytes = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        return books, members, transactions
+
+    def append(self, op, data):
+        """Append one mutation record to the journal"""
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a')
+
+        line = json.dumps({"op": op, "data": data}) + "\n"
+        self._journal.write(line)
+        self._journal.flush()
+        if self.durable:
+            os.fsync(self._journal.fileno())
+        self.pending_entries += 1
+        self.journal_bytes += len(line)
+
+    def needs_compaction(self):
+        return self.journal_bytes >= max(self.min_compact_bytes, self.compact_ratio * self.snapshot_bytes)
+
+    def compact(self, books, members, transactions):
+        """Write a fresh snapshot of all collections and truncate the journal"""
+        save_data([book.to_dict() for book in books], self.books_file)
+        save_data([member.to_dict() for member in members], self.members_file)
+        save_data([t.to_dict() for t in transactions], self.transactions_file)
+
+        # Only drop the journal once every snapshot is safely on disk
+        self.close()
+        open(self.journal_file, 'w').close()
+        self.pending_entries = 0
+        self.journal_bytes = 0
+        self.snapshot_bytes = self._snapshot_size()
+
+    def _snapshot_size(self):
+        return sum(os.path.getsize(filename)
+                   for filename in (self.books_file, self.members_file, self.transactions_file)
+                   if os.path.exists(filename))
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _replay(self, books, members, transactions):
+        """Apply journal entries to the loaded snapshot, returns the number applied"""
+        if not os.path.exists(self.journal_file):
+            return 0
+
+        books_by_id = {book.book_id: i for i, book in enumerate(books)}
+        members_by_id = {member.member_id: i for i, member in enumerate(members)}
+        transactions_by_id = {t.transaction_id: i for i, t in enumerate(transactions)}
+
+        def upsert(collection, index, key, item):
+            # Replaying is idempotent: entries already in the snapshot are overwritten
+            if key in index:
+                collection[index[key]] = item
+            else:
+                index[key] = len(collection)
+                collection.append(item)
+
+        applied = 0
+        valid_end = 0
+        line_number = 0
+        with open(self.journal_file, 'r+') as file:
+            while True:
+                line = file.readline()
+                if not line:
+                    break
+                line_number += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if file.readline():
+                        # Valid entries may follow: dropping them would silently lose data
+                        raise ValueError(
+                            f"Corrupt entry at line {line_number} of {self.journal_file}")
+                    # A torn final write from a crash: drop it so new entries start on a clean line
+                    file.seek(valid_end)
+                    file.truncate()
+                    break
+                valid_end = file.tell()
+
+                op, data = entry["op"], entry["data"]
+                if op == "add_book":
+                    upsert(books, books_by_id, data["book_id"], Book.from_dict(data))
+                elif op == "add_member":
+                    upsert(members, members_by_id, data["member_id"], Member.from_dict(data))
+                elif op == "import_books":
+                    for item in data["books"]:
+                        upsert(books, books_by_id, item["book_id"], Book.from_dict(item))
+                elif op == "import_members":
+                    for item in data["members"]:
+                        upsert(members, members_by_id, item["member_id"], Member.from_dict(item))
+                elif op == "import_transactions":
+                    for item in data["transactions"]:
+                        upsert(transactions, transactions_by_id, item["transaction_id"],
+                               Transaction.from_dict(item))
+                elif op in ("borrow", "return", "borrow_batch", "return_batch"):
+                    if op in ("borrow", "return"):
+                        records = [data["transaction"]] if data.get("transaction") else []
+                        loans = [(data["book_id"], data["member_id"])]
+                    else:
+                        records, loans = data["transactions"], data["loans"]
+                    for item in records:
+                        upsert(transactions, transactions_by_id, item["transaction_id"],
+                               Transaction.from_dict(item))
+
+                    borrowed = op.startswith("borrow")
+                    for book_id, member_id in loans:
+                        book = books[books_by_id[book_id]]
+                        member = members[members_by_id[member_id]]
+                        book.update_availability(not borrowed)
+                        if borrowed:
+                            member.borrow_book(book_id)
+                        else:
+                            member.return_book(book_id)
+                applied += 1
+
+        return applied
+
+
+class SqliteStorage:
+    """
+    SQLite storage backend with indexed tables for books, members and transactions.
+
+    Every journal operation is applied as a single database transaction, and
+    sorting and filtering can be pushed down to the database with query().
+    load() only reads the open loans of the transaction history; the rest
+    stays in the database and is read a page at a time with transactions(),
+    so startup does not grow with the history.
+    """
+
+    supports_queries = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS books (
+            book_id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL,
+            isbn TEXT NOT NULL,
+            available INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_books_title ON books (title);
+        CREATE INDEX IF NOT EXISTS idx_books_author ON books (author);
+        CREATE INDEX IF NOT EXISTS idx_books_isbn ON books (isbn);
+        CREATE INDEX IF NOT EXISTS idx_books_available ON books (available);
+
+        CREATE TABLE IF NOT EXISTS members (
+            member_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            contact TEXT NOT NULL,
+            borrowed_books TEXT NOT NULL,
+            borrowed_count INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_members_name ON members (name);
+        CREATE INDEX IF NOT EXISTS idx_members_contact ON members (contact);
+        CREATE INDEX IF NOT EXISTS idx_members_borrowed_count ON members (borrowed_count);
+
+        CREATE TABLE IF NOT EXISTS transactions (
+            transaction_id INTEGER PRIMARY KEY,
+            book_id INTEGER NOT NULL,
+            member_id INTEGER NOT NULL,
+            borrow_time INTEGER NOT NULL,
+            return_time INTEGER,
+            status TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_loan ON transactions (book_id, member_id, status);
+        CREATE INDEX IF NOT EXISTS idx_transactions_member ON transactions (member_id);
+        CREATE INDEX IF NOT EXISTS idx_transactions_status ON transactions (status);
+    """
+
+    # Columns that may appear in ORDER BY / WHERE, per table
+    QUERY_COLUMNS = {
+        "books": ("book_id", "title", "author", "isbn", "available"),
+        "members": ("member_id", "name", "contact", "borrowed_count"),
+        "transactions": ("transaction_id", "book_id", "member_id", "status"),
+    }
+
+    # SQL equivalents of the logical operations used for secondary sorting
+    LOGIC_SQL = {
+        logical_and: "({p} AND {q})",
+        logical_or: "({p} OR {q})",
+        logical_implies: "(NOT {p} OR {q})",
+    }
+
+    def __init__(self, database_file="library.db"):
+        self.database_file = database_file
+        self.search_index_file = os.path.splitext(database_file)[0] + "_search_index.json"
+        self.lock_file = os.path.join(os.path.dirname(database_file), "library.lock")
+        self.import_progress_file = os.path.splitext(database_file)[0] + "_import_progress.json"
+        self.pending_entries = 0
+        self.connection = sqlite3.connect(database_file)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+
+    def load(self):
+        """Read books, members and the open loans into model objects"""
+        books = [
+            Book(book_id, title, author, isbn, bool(available))
+            for book_id, title, author, isbn, available in self.connection.execute(
+                "SELECT book_id, title, author, isbn, available FROM books ORDER BY book_id")
+        ]
+        members = [
+            Member(member_id, name, contact, json.loads(borrowed_books))
+            for member_id, name, contact, borrowed_books in self.connection.execute(
+                "SELECT member_id, name, contact, borrowed_books FROM members ORDER BY member_id")
+        ]
+        return books, members, self.transactions(where={"status": "borrowed"})
+
+    def append(self, op, data):
+        """Apply one mutation record inside a single database transaction"""
+        with self.connection:
+            if op == "add_book":
+                self._upsert_books([data])
+            elif op == "add_member":
+                self._upsert_members([data])
+            elif op == "import_books":
+                self._upsert_books(data["books"])
+            elif op == "import_members":
+                self._upsert_members(data["members"])
+            elif op == "import_transactions":
+                self._upsert_transactions(data["transactions"])
+            elif op in ("borrow", "return"):
+                if data.get("transaction"):
+                    self._upsert_transactions([data["transaction"]])
+                self._update_loans([(data["book_id"], data["member_id"])], op == "borrow")
+            elif op in ("borrow_batch", "return_batch"):
+                self._upsert_transactions(data["transactions"])
+                self._update_loans(data["loans"], op == "borrow_batch")
+            else:
+                raise ValueError(f"Unknown storage operation: {op}")
+
+    def needs_compaction(self):
+        return False
+
+    def compact(self, books, members, transactions):
+        """Nothing to do: every operation is already durable in the database"""
+
+    def close(self):
+        self.connection.close()
+
+    def query(self, table, order_by=None, descending=False, where=None, limit=None, offset=0,
+              order_expressions=None):
+        """
+        Return primary keys of matching rows, sorted and filtered by the database
+
+        Args:
+            table: 'books', 'members' or 'transactions'
+            order_by: column to sort by
+            descending: sort order for order_by
+            where: dict of {column: value} equality filters
+            limit, offset: pagination
+            order_expressions: extra (sql_expression, descending) tie-breakers
+        """
+        columns = self.QUERY_COLUMNS[table]
+        id_column = columns[0]
+        condition, params = self._where(table, where)
+        sql = f"SELECT {id_column} FROM {table}{condition}"
+
+        ordering = []
+        if order_by:
+            if order_by not in columns:
+                raise ValueError(f"Cannot sort {table} by {order_by}")
+            ordering.append(f"{order_by} {'DESC' if descending else 'ASC'}")
+        for expression, expression_descending in order_expressions or []:
+            ordering.append(f"{expression} {'DESC' if expression_descending else 'ASC'}")
+        # Ties keep ID order, like the stable in-memory sorts
+        ordering.append(f"{id_column} ASC")
+        sql += " ORDER BY " + ", ".join(ordering) + self._limit(limit, offset, params)
+        return [row[0] for row in self.connection.execute(sql, params)]
+
+    def transactions(self, where=None, limit=None, offset=0):
+        """Transactions matching the where filters (as in query()), in ID order"""
+        condition, params = self._where("transactions", where)
+        rows = self.connection.execute(
+            "SELECT transaction_id, book_id, member_id, borrow_time, return_time, status "
+            f"FROM transactions{condition} ORDER BY transaction_id" + self._limit(limit, offset, params),
+            params)
+        return [
+            Transaction(transaction_id, book_id, member_id, status=status,
+                        borrow_time=borrow_time, return_time=return_time)
+            for transaction_id, book_id, member_id, borrow_time, return_time, status in rows
+        ]
+
+    def count(self, table, where=None):
+        condition, params = self._where(table, where)
+        return self.connection.execute(f"SELECT COUNT(*) FROM {table}{condition}", params).fetchone()[0]
+
+    def max_id(self, table):
+        """Largest primary key in a table, 0 if it is empty"""
+        id_column = self.QUERY_COLUMNS[table][0]
+        return self.connection.execute(f"SELECT MAX({id_column}) FROM {table}").fetchone()[0] or 0
+
+    def _where(self, table, where):
+        """SQL condition and parameters for {column: value} equality filters"""
+        if not where:
+            return "", []
+        clauses, params = [], []
+        for column, value in where.items():
+            if column not in self.QUERY_COLUMNS[table]:
+                raise ValueError(f"Cannot filter {table} by {column}")
+            clauses.append(f"{column} = ?")
+            params.append(value)
+        return " WHERE " + " AND ".join(clauses), params
+
+    def _limit(self, limit, offset, params):
+        if limit is None and not offset:
+            return ""
+        # SQLite reads LIMIT -1 as no limit
+        params.extend([-1 if limit is None else limit, offset])
+        return " LIMIT ? OFFSET ?"
+
+    def sorted_ids(self, table, primary_key, secondary_keys=None):
+        """Sort a table by database ORDER BY with the same key semantics as sorting.py"""
+        order_expressions = []
+        for logic_func, p_key, q_key in secondary_keys or []:
+            columns = self.QUERY_COLUMNS[table]
+            if p_key not in columns or q_key not in columns:
+                raise ValueError(f"Cannot sort {table} by {p_key}/{q_key}")
+            # True results come before False, as in the in-memory merge
+            order_expressions.append((self.LOGIC_SQL[logic_func].format(p=p_key, q=q_key), True))
+        return self.query(table, order_by=primary_key, order_expressions=order_expressions)
+
+    def _upsert_books(self, books):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO books (book_id, title, author, isbn, available) "
+            "VALUES (:book_id, :title, :author, :isbn, :available)",
+            ({**book, "isbn": str(book["isbn"])} for book in books))
+
+    def _upsert_members(self, members):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO members (member_id, name, contact, borrowed_books, borrowed_count) "
+            "VALUES (?, ?, ?, ?, ?)",
+            ((member["member_id"], member["name"], member["contact"],
+              json.dumps(member["borrowed_books"]), len(member["borrowed_books"]))
+             for member in members))
+
+    def _upsert_transactions(self, transactions):
+        # Times are stored as epoch seconds, so they sort and compare as numbers
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO transactions "
+            "(transaction_id, book_id, member_id, borrow_time, return_time, status) "
+            "VALUES (:transaction_id, :book_id, :member_id, :borrow_time, :return_time, :status)",
+            transactions)
+
+    def _update_loans(self, loans, borrowed):
+        """Apply (book_id, member_id) borrows or returns to book availability and borrowed lists"""
+        self.connection.executemany(
+            "UPDATE books SET available = ? WHERE book_id = ?",
+            ((not borrowed, book_id) for book_id, _ in loans))
+
+        # Each member's borrowed list is read and written once per batch
+        borrowed_lists = {}
+        for book_id, member_id in loans:
+            if member_id not in borrowed_lists:
+                row = self.connection.execute(
+                    "SELECT borrowed_books FROM members WHERE member_id = ?", (member_id,)).fetchone()
+                borrowed_lists[member_id] = json.loads(row[0])
+            borrowed_books = borrowed_lists[member_id]
+            if borrowed and book_id not in borrowed_books:
+                borrowed_books.append(book_id)
+            elif not borrowed and book_id in borrowed_books:
+                borrowed_books.remove(book_id)
+        self.connection.executemany(
+            "UPDATE members SET borrowed_books = ?, borrowed_count = ? WHERE member_id = ?",
+            ((json.dumps(borrowed_books), len(borrowed_books), member_id)
+             for member_id, borrowed_books in borrowed_lists.items()))
+
+
+# Available storage backends, selectable by name
+STORAGE_BACKENDS = {
+    "json": JsonStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+def get_storage_backend(name="json", **options):
+    """Create a storage backend by name"""
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name}. Choose from {list(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[name](**options)
@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import storage
+from book import Book
+from member import Member
+from storage import JsonStorage
+from transaction import Transaction
+
+
+class JsonStorageJournalTest(unittest.TestCase):
+    """Crash recovery of the JSON journal: replay, torn writes, corruption and compaction"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.storage = self.open_storage()
+        self.addCleanup(self.storage.close)
+
+    def open_storage(self, **kwargs):
+        directory = self._tmp.name
+        kwargs.setdefault("durable", False)
+        return JsonStorage(*(os.path.join(directory, name) for name in (
+            "books.json", "members.json", "transactions.json", "library_journal.jsonl")), **kwargs)
+
+    def reopen(self):
+        """Load the data the way a new process would, without closing the old storage"""
+        reopened = self.open_storage()
+        self.addCleanup(reopened.close)
+        return reopened.load()
+
+    def append_every_op(self):
+        self.storage.append("add_book", Book(1, "Dune", "Herbert", "9780441013593").to_dict())
+        self.storage.append("add_member", Member(1, "Ada", "ada@example.com").to_dict())
+        self.storage.append("import_books", {"books": [
+            Book(2, "Emma", "Austen", "9780141439587").to_dict(),
+            Book(3, "Ulysses", "Joyce", "9780199535675").to_dict(),
+        ]})
+        self.storage.append("import_members", {"members": [Member(2, "Alan", "alan@example.com").to_dict()]})
+        self.storage.append("import_transactions", {"transactions": [
+            Transaction(1, 3, 2, status="returned", borrow_time=100, return_time=200).to_dict(),
+        ]})
+        self.storage.append("borrow", {"book_id": 1, "member_id": 1, "transaction":
+                            Transaction(2, 1, 1, borrow_time=300).to_dict()})
+        self.storage.append("return", {"book_id": 1, "member_id": 1, "transaction":
+                            Transaction(2, 1, 1, status="returned", borrow_time=300, return_time=400).to_dict()})
+        self.storage.append("borrow_batch", {"loans": [[2, 2], [3, 2]], "transactions": [
+            Transaction(3, 2, 2, borrow_time=500).to_dict(),
+            Transaction(4, 3, 2, borrow_time=500).to_dict(),
+        ]})
+        self.storage.append("return_batch", {"loans": [[3, 2]], "transactions": [
+            Transaction(4, 3, 2, status="returned", borrow_time=500, return_time=600).to_dict(),
+        ]})
+
+    def assert_every_op_applied(self, books, members, transactions):
+        self.assertEqual([book.book_id for book in books], [1, 2, 3])
+        self.assertEqual([book.available for book in books], [True, False, True])
+        self.assertEqual([member.member_id for member in members], [1, 2])
+        self.assertEqual(members[0].borrowed_books, [])
+        self.assertEqual(members[1].borrowed_books, [2])
+        self.assertEqual([(t.transaction_id, t.status) for t in transactions],
+                         [(1, "returned"), (2, "returned"), (3, "borrowed"), (4, "returned")])
+        self.assertEqual(transactions[3].return_time, 600)
+
+    def test_replays_every_op_after_crash(self):
+        self.storage.load()
+        self.append_every_op()
+
+        # No close(): the process died with the journal still open
+        self.assert_every_op_applied(*self.reopen())
+
+    def test_torn_final_line_is_truncated(self):
+        self.storage.load()
+        self.storage.append("add_book", Book(1, "Dune", "Herbert", "9780441013593").to_dict())
+        self.storage.close()
+        with open(self.storage.journal_file, "a") as file:
+            file.write('{"op": "add_book", "data": {"book_id": 2, "ti')
+
+        books, _, _ = self.reopen()
+
+        self.assertEqual([book.book_id for book in books], [1])
+        with open(self.storage.journal_file) as file:
+            lines = file.readlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["data"]["book_id"], 1)
+
+        # New entries start on a clean line after the truncated one
+        reopened = self.open_storage()
+        self.addCleanup(reopened.close)
+        reopened.load()
+        reopened.append("add_book", Book(3, "Emma", "Austen", "9780141439587").to_dict())
+        books, _, _ = self.reopen()
+        self.assertEqual([book.book_id for book in books], [1, 3])
+
+    def test_corrupt_middle_line_raises(self):
+        self.storage.load()
+        self.storage.append("add_book", Book(1, "Dune", "Herbert", "9780441013593").to_dict())
+        self.storage.close()
+        with open(self.storage.journal_file, "a") as file:
+            file.write("not json\n")
+        self.storage.append("add_book", Book(2, "Emma", "Austen", "9780141439587").to_dict())
+
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            self.reopen()
+
+    def test_replay_is_idempotent_after_crash_during_compact(self):
+        self.storage.load()
+        self.append_every_op()
+        books, members, transactions = self.reopen()
+
+        # Crash after the books snapshot is written, before members and transactions
+        real_save_data = storage.save_data
+        calls = []
+
+        def save_then_crash(data, filename):
+            if calls:
+                raise OSError("simulated crash")
+            calls.append(filename)
+            real_save_data(data, filename)
+
+        with mock.patch("storage.save_data", side_effect=save_then_crash):
+            with self.assertRaises(OSError):
+                self.storage.compact(books, members, transactions)
+
+        self.assertEqual(calls, [self.storage.books_file])
+        self.assertGreater(os.path.getsize(self.storage.journal_file), 0)
+        self.assert_every_op_applied(*self.reopen())
+
+    def test_needs_compaction_threshold(self):
+        limited = self.open_storage(compact_ratio=0.5, min_compact_bytes=100)
+        self.addCleanup(limited.close)
+        limited.load()
+
+        limited.snapshot_bytes = 1000
+        limited.journal_bytes = 499
+        self.assertFalse(limited.needs_compaction())
+        limited.journal_bytes = 500
+        self.assertTrue(limited.needs_compaction())
+
+        # Small snapshots are compacted only once the journal reaches min_compact_bytes
+        limited.snapshot_bytes = 10
+        limited.journal_bytes = 99
+        self.assertFalse(limited.needs_compaction())
+        limited.journal_bytes = 100
+        self.assertTrue(limited.needs_compaction())
+
+    def test_compact_truncates_journal(self):
+        self.storage.load()
+        self.append_every_op()
+        books, members, transactions = self.reopen()
+
+        self.storage.compact(books, members, transactions)
+
+        self.assertEqual(os.path.getsize(self.storage.journal_file), 0)
+        self.assertEqual(self.storage.journal_bytes, 0)
+        self.assertEqual(self.storage.pending_entries, 0)
+        self.assert_every_op_applied(*self.reopen())
+
+
+if __name__ == "__main__":
+    unittest.main()
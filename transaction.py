@@ -1,41 +1,179 @@
-import datetime
+import sys
+import time
+from array import array
+
+# Month abbreviations used by time.ctime(), for parsing dates stored by older versions
+_MONTHS = {name: i for i, name in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+
+def _parse_ctime(value):
+    """Convert a ctime() string such as 'Mon Mar  3 14:05:09 2025' to epoch seconds"""
+    _, month, day, clock, year = value.split()
+    hour, minute, second = clock.split(":")
+    return int(time.mktime((int(year), _MONTHS[month], int(day),
+                            int(hour), int(minute), int(second), 0, 0, -1)))
+
 
 class Transaction:
-    def __init__(self, transaction_id, book_id, member_id, borrow_date=None, return_date=None, status="borrowed"):
+    # Dates are kept as epoch seconds and only formatted for display and storage
+    __slots__ = ("transaction_id", "book_id", "member_id", "borrow_time", "return_time", "status")
+
+    def __init__(self, transaction_id, book_id, member_id, borrow_date=None, return_date=None, status="borrowed",
+                 borrow_time=None, return_time=None):
         self.transaction_id = transaction_id
         self.book_id = book_id
         self.member_id = member_id
-        self.borrow_date = borrow_date if borrow_date else datetime.datetime.now().ctime()
-        self.return_date = return_date
-        self.status = status
+        if borrow_time is None:
+            borrow_time = _parse_ctime(borrow_date) if borrow_date else int(time.time())
+        if return_time is None and return_date:
+            return_time = _parse_ctime(return_date)
+        self.borrow_time = borrow_time
+        self.return_time = return_time
+        self.status = sys.intern(status)
+
+    @property
+    def borrow_date(self):
+        return time.ctime(self.borrow_time)
+
+    @property
+    def return_date(self):
+        return time.ctime(self.return_time) if self.return_time is not None else None
 
     def display_info(self):
         return_info = f", Return Date: {self.return_date}" if self.return_date else ""
         return f"ID: {self.transaction_id}, Book ID: {self.book_id}, Member ID: {self.member_id}, " \
                f"Borrow Date: {self.borrow_date}{return_info}, Status: {self.status}"
-    
+
     def complete_return(self):
         self.status = "returned"
-        self.return_date = datetime.datetime.now().ctime()
-    
+        self.return_time = int(time.time())
+
     def to_dict(self):
         return {
             "transaction_id": self.transaction_id,
             "book_id": self.book_id,
             "member_id": self.member_id,
-            "borrow_date": self.borrow_date,
-            "return_date": self.return_date,
+            "borrow_time": self.borrow_time,
+            "return_time": self.return_time,
             "status": self.status
         }
-    
+
     @classmethod
     def from_dict(cls, data):
+        if "borrow_time" not in data:
+            # Files written before times were stored as epoch seconds
+            return cls(
+                transaction_id=data["transaction_id"],
+                book_id=data["book_id"],
+                member_id=data["member_id"],
+                borrow_date=data["borrow_date"],
+                return_date=data["return_date"],
+                status=data["status"]
+            )
         return cls(
             transaction_id=data["transaction_id"],
             book_id=data["book_id"],
             member_id=data["member_id"],
-            borrow_date=data["borrow_date"],
-            return_date=data["return_date"],
-            status=data["status"]
+            status=data["status"],
+            borrow_time=data["borrow_time"],
+            return_time=data["return_time"]
         )
-    
\ No newline at end of file
+
+
+class TransactionStore:
+    """
+    Columnar, array-backed storage for large transaction histories.
+
+    Each field is kept in its own typed array (8 bytes per value) and the status
+    is stored as a small integer code, instead of one Python object per record.
+    Indexing the store returns a TransactionView.
+    """
+
+    STATUSES = ("borrowed", "returned")
+    NO_TIME = -1
+
+    def __init__(self, transactions=None):
+        self.transaction_ids = array('q')
+        self.book_ids = array('q')
+        self.member_ids = array('q')
+        self.borrow_times = array('q')
+        self.return_times = array('q')
+        self.status_codes = array('b')
+
+        for transaction in transactions or []:
+            self.append(transaction)
+
+    def append(self, transaction):
+        """Copy a Transaction (or view) into the columns, returns its row index"""
+        self.transaction_ids.append(transaction.transaction_id)
+        self.book_ids.append(transaction.book_id)
+        self.member_ids.append(transaction.member_id)
+        self.borrow_times.append(transaction.borrow_time)
+        self.return_times.append(
+            self.NO_TIME if transaction.return_time is None else transaction.return_time)
+        self.status_codes.append(self.STATUSES.index(transaction.status))
+        return len(self.transaction_ids) - 1
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return TransactionView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield TransactionView(self, index)
+
+    def nbytes(self):
+        """Memory used by the column buffers"""
+        columns = (self.transaction_ids, self.book_ids, self.member_ids,
+                   self.borrow_times, self.return_times, self.status_codes)
+        return sum(column.itemsize * len(column) for column in columns)
+
+
+class TransactionView(Transaction):
+    """A lightweight Transaction backed by one row of a TransactionStore"""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def transaction_id(self):
+        return self._store.transaction_ids[self._index]
+
+    @property
+    def book_id(self):
+        return self._store.book_ids[self._index]
+
+    @property
+    def member_id(self):
+        return self._store.member_ids[self._index]
+
+    @property
+    def borrow_time(self):
+        return self._store.borrow_times[self._index]
+
+    @property
+    def return_time(self):
+        value = self._store.return_times[self._index]
+        return None if value == TransactionStore.NO_TIME else value
+
+    @return_time.setter
+    def return_time(self, value):
+        self._store.return_times[self._index] = TransactionStore.NO_TIME if value is None else value
+
+    @property
+    def status(self):
+        return TransactionStore.STATUSES[self._store.status_codes[self._index]]
+
+    @status.setter
+    def status(self, value):
+        self._store.status_codes[self._index] = TransactionStore.STATUSES.index(value)
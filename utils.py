@@ -18,6 +18,22 @@ def validate_isbn(isbn):
     
     return True
 
+def normalize_isbn(isbn):
+    """
+    Canonical form of an ISBN for duplicate detection: hyphens and spaces
+    stripped, and ISBN-10 converted to its ISBN-13 (978 prefix)
+    
+    Returns None if the value is not a 10 or 13 character ISBN.
+    """
+    isbn = str(isbn).replace("-", "").replace(" ", "").upper()
+    if len(isbn) == 13 and isbn.isdigit():
+        return isbn
+    if len(isbn) == 10 and isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == 'X'):
+        body = "978" + isbn[:9]
+        total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(body))
+        return body + str((10 - total % 10) % 10)
+    return None
+
 def validate_name(name):
     # Name should be between 2 and 50 characters and contain only letters and spaces
     if len(name) < 2 or len(name) > 50:
@@ -34,17 +50,24 @@ def validate_author(author):
         return False
     return bool(re.match(r"^[a-zA-Z\s.,-]+$", author))
 
+# Contact patterns, shared with the bulk CSV validation in data_handler.py
+EMAIL_PATTERN = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
+PHONE_PATTERN = r"^\d{10}$"
+
 def validate_contact(contact):
     # Simple email or phone validation with regex
-    # Email pattern
-    email_pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    # Phone pattern (10 digits)
-    phone_pattern = r"^\d{10}$"
-    
-    if re.match(email_pattern, contact) or re.match(phone_pattern, contact):
+    if re.match(EMAIL_PATTERN, contact) or re.match(PHONE_PATTERN, contact):
         return True
     return False
 
+def normalize_contact(contact):
+    """Canonical form of a contact: emails lower-cased, phone numbers reduced to their digits"""
+    contact = str(contact).strip()
+    if "@" in contact:
+        return contact.lower()
+    digits = re.sub(r"\D", "", contact)
+    return digits or contact
+
 def validate_integer(input_str):
     try:
         int(input_str)
@@ -60,9 +83,15 @@ def get_valid_input(prompt, validator_func, error_msg):
         print(f"Error: {error_msg}")
 
 # File handling functions
-def save_data(data, filename):
-    with open(filename, 'w') as file:
-        json.dump(data, file, indent=4)
+def save_data(data, filename, indent=4):
+    # Write to a temporary file first so a crash never leaves a half-written file
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, 'w') as file:
+        # One dumps call is much faster than json.dump's many small writes
+        file.write(json.dumps(data, indent=indent))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_filename, filename)
 
 def load_data(filename):
     if os.path.exists(filename):